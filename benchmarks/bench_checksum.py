@@ -0,0 +1,108 @@
+"""
+Equivalence and throughput of the incremental lab 3 checksum.
+
+Checks that ChecksumBuilder gives byte for byte the md5 of calculate_checksum for rows
+added one at a time in random order, as sorted chunks from several workers, and as
+array('i') and NumPy arrays, then times both on a large set of row numbers and reports
+the peak memory each one needs; an unsorted array is sorted in bounded slices, so its
+peak stays far below that of calculate_checksum. Run from the repository root:
+
+    python benchmarks/bench_checksum.py --rows 2000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from array import array
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab_3"))
+
+from checksum import ChecksumBuilder, calculate_checksum  # noqa: E402
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def one_by_one(rows) -> str:
+    builder = ChecksumBuilder()
+    for row in rows:
+        builder.add(row)
+    return builder.hexdigest()
+
+
+def in_chunks(rows, parts: int, is_sorted: bool) -> str:
+    builder = ChecksumBuilder()
+    step = -(-len(rows) // parts) or 1
+    for start in range(0, len(rows), step):
+        chunk = rows[start:start + step]
+        builder.add_rows(sorted(chunk) if is_sorted else chunk, is_sorted)
+    return builder.hexdigest()
+
+
+def check(generator: random.Random) -> int:
+    """Compare the builder with calculate_checksum on small inputs; return the number of cases."""
+    cases = 0
+    for size in (0, 1, 2, 10, 1000, 70000):
+        rows = [generator.randrange(size * 2 + 1) for _ in range(size)]
+        original = list(rows)
+        expected = calculate_checksum(rows)
+        if rows != original:
+            sys.exit("calculate_checksum changed its argument")
+        variants = {
+            "one by one": one_by_one(rows),
+            "ascending": one_by_one(sorted(rows)),
+            "unsorted chunks": in_chunks(rows, 7, False),
+            "sorted chunks": in_chunks(rows, 7, True),
+            "array('i')": in_chunks(array("i", rows), 3, False),
+        }
+        if numpy is not None:
+            values = numpy.array(rows, dtype=numpy.int64)
+            variants["numpy"] = in_chunks(values, 3, False)
+            variants["numpy int32 strided"] = in_chunks(numpy.repeat(values.astype(numpy.int32), 2)[::2], 1, False)
+            if not numpy.array_equal(values, numpy.array(rows, dtype=numpy.int64)):
+                sys.exit("add_rows changed a numpy argument")
+        for name, digest in variants.items():
+            if digest != expected:
+                sys.exit(f"{size} rows, {name}: {digest} != {expected}")
+            cases += 1
+    return cases
+
+
+def measure(name: str, function, *args) -> None:
+    """Time one run of function(*args), then repeat it under tracemalloc for the peak memory."""
+    started = time.perf_counter()
+    digest = function(*args)
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{name:24} {elapsed:7.3f} s peak {peak / 2 ** 20:8.1f} MiB {digest}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=2000000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    generator = random.Random(args.seed)
+    print(f"{check(generator)} cases identical to calculate_checksum")
+
+    rows = sorted(generator.sample(range(args.rows * 100), args.rows))
+    shuffled = list(rows)
+    generator.shuffle(shuffled)
+    measure("calculate_checksum", calculate_checksum, shuffled)
+    measure("builder, ascending", one_by_one, rows)
+    measure("builder, random order", one_by_one, shuffled)
+    measure("builder, 8 sorted chunks", in_chunks, array("q", rows), 8, True)
+    measure("builder, unsorted array", in_chunks, array("i", shuffled), 1, False)
+    if numpy is not None:
+        measure("builder, numpy", in_chunks, numpy.array(shuffled, dtype=numpy.int64), 1, False)
+
+
+if __name__ == "__main__":
+    main()
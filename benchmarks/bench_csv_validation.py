@@ -0,0 +1,111 @@
+"""
+Throughput of the lab 3 csv validation in one process and in a process pool.
+
+Writes a synthetic 10-column file in the lab's format (utf-16, ";" delimiter, quoted
+cells) with a known set of invalid cells, checks that find_invalid_rows reports exactly
+those rows with any number of workers, and times each run. Run from the repository root:
+
+    python benchmarks/bench_csv_validation.py --rows 500000 --workers 4
+"""
+import argparse
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab_3"))
+
+from checksum import calculate_checksum  # noqa: E402
+from validation import find_invalid_rows  # noqa: E402
+
+OCCUPATIONS = ("Web-программист", "Слесарь-механик", "Ассистент менеджера по продажам", "Врач",
+               "Data scientist", "Инженер-конструктор", "Product manager")
+
+Generator = Callable[[random.Random], str]
+
+# Valid and invalid value generators for each synthetic column.
+COLUMNS: Dict[str, Tuple[Generator, List[Generator]]] = {
+    "email": (
+        lambda r: f"user{r.randrange(10 ** 4)}.{r.randrange(1900, 2024)}@{r.choice(('mail', 'sub.domain'))}.ru",
+        [lambda r: f"user{r.randrange(100)}@@mail.ru", lambda r: f"user{r.randrange(100)}.mail.ru"]),
+    "telephone": (
+        lambda r: f"+7-({r.randrange(1000):03})-{r.randrange(1000):03}-{r.randrange(100):02}-{r.randrange(100):02}",
+        [lambda r: f"8{r.randrange(10 ** 10):010}", lambda r: f"+7-({r.randrange(1000):03})-{r.randrange(10 ** 7):07}"]),
+    "snils": (
+        lambda r: f"{r.randrange(10 ** 11):011}",
+        [lambda r: f"{r.randrange(10 ** 10):010}", lambda r: f"{r.randrange(10 ** 3):03}-{r.randrange(10 ** 8):08}"]),
+    "inn": (
+        lambda r: f"{r.randrange(10 ** 12):012}",
+        [lambda r: f"{r.randrange(10 ** 11):011}", lambda r: f"{r.randrange(10 ** 12):012}a"]),
+    "passport": (
+        lambda r: f"{r.randrange(100):02} {r.randrange(100):02} {r.randrange(10 ** 6):06}",
+        [lambda r: f"{r.randrange(10 ** 4):04} {r.randrange(10 ** 6):06}", lambda r: f"{r.randrange(10 ** 10):010}"]),
+    "ip_v4": (
+        lambda r: ".".join(str(r.randrange(256)) for _ in range(4)),
+        [lambda r: f"{r.randrange(256, 1000)}.1.1.1", lambda r: ".".join(str(r.randrange(256)) for _ in range(3))]),
+    "occupation": (
+        lambda r: r.choice(OCCUPATIONS),
+        [lambda r: r.choice(OCCUPATIONS) + "!", lambda r: f"Developer_{r.randrange(10)}"]),
+    "blood_type": (
+        lambda r: r.choice(("A", "B", "AB", "O")) + r.choice(("+", "−")),
+        [lambda r: r.choice(("A", "B", "AB", "O")) + "-", lambda r: r.choice(("C+", "AO−"))]),
+    "uuid": (
+        lambda r: str(uuid.UUID(int=r.getrandbits(128), version=4)),
+        [lambda r: str(uuid.UUID(int=r.getrandbits(128), version=4))[:-1], lambda r: uuid.UUID(int=r.getrandbits(128)).hex]),
+    "time": (
+        lambda r: f"{r.randrange(24):02}:{r.randrange(60):02}:{r.randrange(60):02}.{r.randrange(10 ** 6):06}",
+        [lambda r: f"{r.randrange(24, 30)}:{r.randrange(60):02}:{r.randrange(60):02}.{r.randrange(10 ** 6):06}",
+         lambda r: f"{r.randrange(24):02}:{r.randrange(60, 99)}:{r.randrange(60):02}"]),
+}
+
+
+def write_synthetic_csv(path: str, rows: int, invalid_per_column: int, seed: int = 0) -> List[int]:
+    """
+    Write a lab 3 style csv file with invalid_per_column corrupted cells in every column.
+
+    :return: sorted 0-based numbers of the rows holding at least one invalid cell
+    """
+    generator = random.Random(seed)
+    corrupted = {name: set(generator.sample(range(rows), min(invalid_per_column, rows))) for name in COLUMNS}
+    with open(path, "w", encoding="utf-16", newline="") as file:
+        writer = csv.writer(file, delimiter=";", quoting=csv.QUOTE_ALL)
+        writer.writerow(COLUMNS)
+        for number in range(rows):
+            writer.writerow([generator.choice(invalid)(generator) if number in corrupted[name] else valid(generator)
+                             for name, (valid, invalid) in COLUMNS.items()])
+    return sorted(set().union(*corrupted.values()))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--invalid-per-column", type=int, default=None,
+                        help="corrupted cells per column, 1%% of the rows by default like the lab files")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    invalid_per_column = args.invalid_per_column if args.invalid_per_column is not None else args.rows // 100
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "synthetic.csv")
+        expected = write_synthetic_csv(path, args.rows, invalid_per_column, args.seed)
+        print(f"{args.rows} rows, {os.path.getsize(path) / 2 ** 20:.1f} MiB, {len(expected)} invalid")
+
+        baseline = None
+        for workers in sorted({1, args.workers}):
+            started = time.perf_counter()
+            rows = find_invalid_rows(path, workers)
+            elapsed = time.perf_counter() - started
+            if rows != expected:
+                sys.exit(f"{workers} worker(s): {len(rows)} invalid rows reported, {len(expected)} expected")
+            baseline = baseline or elapsed
+            print(f"{workers:3} worker(s) {elapsed:8.3f} s {args.rows / elapsed:12.0f} rows/s "
+                  f"({baseline / elapsed:.1f}x) checksum {calculate_checksum(rows)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Count the SQL statements and time spent per CustomerDataLayer lookup.
+
+Run from the repository root:
+
+    python benchmarks/bench_customer_lookups.py --customers 1000 --lists 30
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab_1"))
+
+from customer_data_access import CustomerDataLayer  # noqa: E402
+from customer_schema import DEFAULT_PREFETCH  # noqa: E402
+from model_objects import Address, Customer, CustomerType, ShoppingList  # noqa: E402
+
+
+def seed(conn: sqlite3.Connection, customers: int, lists: int) -> None:
+    """Fill the database with company customers, each with an address and `lists` shopping lists."""
+    def generate():
+        for i in range(1, customers + 1):
+            customer = Customer(external_id=f"ext-{i}", master_external_id=f"ext-{i - 1}", name=f"Company {i}",
+                                customer_type=CustomerType.COMPANY, company_number=f"cn-{i}")
+            customer.address = Address(f"Street {i}", "City", f"{i:05d}")
+            for j in range(lists):
+                customer.add_shopping_list(ShoppingList([f"item {i}", f"item {j}"]))
+            yield customer
+
+    CustomerDataLayer(conn).create_customer_records(generate())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--lists", type=int, default=30)
+    parser.add_argument("--lookups", type=int, default=1000)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(":memory:")
+    seed(conn, args.customers, args.lists)
+    layer = CustomerDataLayer(conn)
+    statements = []
+    conn.set_trace_callback(statements.append)
+
+    # Customer i is the master record of customer i + 1, so master keys run from ext-1 to ext-(n - 1).
+    lookups = {
+        "find_by_external_id": (layer.find_by_external_id, "ext-{}", args.customers),
+        "find_by_master_external_id": (layer.find_by_master_external_id, "ext-{}", args.customers - 1),
+        "find_by_company_number": (layer.find_by_company_number, "cn-{}", args.customers),
+    }
+    # The full customer with every relation touched, and the customers row alone as used for matching.
+    modes = {
+        "full": (DEFAULT_PREFETCH, True),
+        "row": ((), False),
+    }
+    for name, (method, key, count) in lookups.items():
+        for mode, (prefetch, touch) in modes.items():
+            statements.clear()
+            started = time.perf_counter()
+            for i in range(args.lookups):
+                customer = method(key.format(i % count + 1), prefetch)
+                if touch:
+                    customer.shoppingLists
+            elapsed = time.perf_counter() - started
+            print(f"{name:28} {mode:5} {len(statements) / args.lookups:6.2f} statements/lookup "
+                  f"{elapsed / args.lookups * 1e6:9.1f} us/lookup")
+
+
+if __name__ == "__main__":
+    main()
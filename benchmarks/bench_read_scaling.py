@@ -0,0 +1,68 @@
+"""
+Read scaling of a pooled CustomerDataLayer across 1..N threads on an on-disk SQLite file.
+
+Run from the repository root:
+
+    python benchmarks/bench_read_scaling.py --threads 8 --lookups 2000
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab_1"))
+
+from bench_customer_lookups import seed  # noqa: E402
+from connection_pool import ConnectionPool, file_connection_factory  # noqa: E402
+from customer_data_access import CustomerDataLayer  # noqa: E402
+
+
+def measure(layer: CustomerDataLayer, threads: int, lookups: int, customers: int) -> float:
+    """Run `lookups` external-ID lookups on each of `threads` threads and return lookups per second."""
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(offset: int) -> None:
+        barrier.wait()
+        for i in range(lookups):
+            layer.find_by_external_id(f"ext-{(offset + i * 7) % customers + 1}")
+
+    workers = [threading.Thread(target=worker, args=(i * 1000,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    return threads * lookups / (time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--customers", type=int, default=5000)
+    parser.add_argument("--lists", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "customers.sqlite")
+        conn = sqlite3.connect(path)
+        seed(conn, args.customers, args.lists)
+        conn.close()
+
+        pool = ConnectionPool(file_connection_factory(path), max_size=args.threads)
+        layer = CustomerDataLayer(pool=pool)
+        baseline = None
+        for threads in range(1, args.threads + 1):
+            rate = measure(layer, threads, args.lookups, args.customers)
+            baseline = baseline or rate
+            print(f"{threads:3d} threads {rate:10.0f} lookups/s  x{rate / baseline:4.2f}")
+        layer.close()
+        pool.close()
+
+
+if __name__ == "__main__":
+    main()
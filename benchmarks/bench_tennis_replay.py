@@ -0,0 +1,98 @@
+"""
+Throughput and memory of the streaming tennis point replay.
+
+Generates an interleaved event log of many simultaneous matches on the fly, checks the
+score changes of replay_points against one TennisGameDefactored3 object per match, and
+measures the peak memory of replaying logs of growing length with the same number of
+live matches, for --live and for --small-live. With few live matches nearly every event
+belongs to a new match, so memory held per finished match would show up there. Run from
+the repository root:
+
+    python benchmarks/bench_tennis_replay.py --live 1000 --events 1000000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab_1"))
+
+from lab1 import TennisGameDefactored3  # noqa: E402
+from tennis_replay import replay_points  # noqa: E402
+
+
+def event_log(live: int, events: int, seed: int):
+    """Yield (match_id, player_name) events of `live` concurrent matches, replacing each one that ends."""
+    generator = random.Random(seed)
+    match_ids = list(range(live))
+    points = {match_id: [0, 0] for match_id in match_ids}
+    for _ in range(events):
+        slot = generator.randrange(live)
+        match_id = match_ids[slot]
+        winner = generator.random() < 0.5
+        score = points[match_id]
+        score[0 if winner else 1] += 1
+        yield match_id, f"home {match_id}" if winner else f"away {match_id}"
+        if max(score) >= 4 and abs(score[0] - score[1]) >= 2:
+            del points[match_id]
+            match_ids[slot] = match_id + live
+            points[match_id + live] = [0, 0]
+
+
+def players(match_id: int):
+    """Names of the players of a generated match."""
+    return f"home {match_id}", f"away {match_id}"
+
+
+def reference_changes(events):
+    """Score changes computed with one TennisGameDefactored3 object per match."""
+    games = {}
+    for match_id, player_name in events:
+        game = games.get(match_id)
+        if game is None:
+            game = games[match_id] = TennisGameDefactored3(*players(match_id))
+        previous = game.score()
+        game.won_point(player_name)
+        score = game.score()
+        finished = score.startswith("Win for")
+        if finished:
+            del games[match_id]
+        if score != previous or finished:
+            yield match_id, score, finished
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--live", type=int, default=1000)
+    parser.add_argument("--small-live", type=int, default=10)
+    parser.add_argument("--events", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    check_events = min(args.events, 100000)
+    expected = list(reference_changes(event_log(args.live, check_events, args.seed)))
+    actual = [tuple(change) for change in replay_points(event_log(args.live, check_events, args.seed), players)]
+    if actual != expected:
+        sys.exit("replay_points disagrees with the TennisGameDefactored3 reference")
+    print(f"{len(actual)} score changes over {check_events} events identical to TennisGameDefactored3")
+
+    for live in sorted({args.live, args.small_live}, reverse=True):
+        for events in (args.events // 100, args.events // 10, args.events):
+            log = list(event_log(live, events, args.seed))
+            started = time.perf_counter()
+            changes = sum(1 for _ in replay_points(log, players))
+            elapsed = time.perf_counter() - started
+
+            tracemalloc.start()
+            for _ in replay_points(log, players):
+                pass
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{live:6} live {events:9} events {changes:9} changes {events / elapsed:12.0f} events/s "
+                  f"peak {peak / 1024:8.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
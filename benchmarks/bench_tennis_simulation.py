@@ -0,0 +1,80 @@
+"""
+Compare the NumPy tennis simulation engine with the per-object won_point loop.
+
+Plays the same random points through TennisGameDefactored3 objects and through
+play_points, checks that final scores, winners and game lengths agree, and reports the
+throughput of both. Run from the repository root:
+
+    python benchmarks/bench_tennis_simulation.py --games 100000 --probability 0.55
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab_1"))
+
+from lab1 import TennisGameDefactored3  # noqa: E402
+from tennis_simulation import DEFAULT_MAX_POINTS, play_points, simulate_games  # noqa: E402
+
+
+def play_loop(point_winners: np.ndarray):
+    """Play every game point by point on TennisGameDefactored3 objects, stopping at the win."""
+    scores, winners, lengths = [], [], []
+    for row in point_winners.tolist():
+        game = TennisGameDefactored3("player1", "player2")
+        winner, length = 0, -1
+        for number, p1_won in enumerate(row, 1):
+            game.won_point("player1" if p1_won else "player2")
+            score = game.score()
+            if score.startswith("Win for"):
+                winner, length = (1 if score.endswith("player1") else 2), number
+                break
+        scores.append(game.score())
+        winners.append(winner)
+        lengths.append(length)
+    return scores, winners, lengths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--points", type=int, default=DEFAULT_MAX_POINTS)
+    parser.add_argument("--probability", type=float, default=0.55)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    point_winners = np.random.default_rng(args.seed).random((args.games, args.points)) < args.probability
+
+    started = time.perf_counter()
+    scores, winners, lengths = play_loop(point_winners)
+    loop_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    result = play_points(point_winners)
+    engine_seconds = time.perf_counter() - started
+    engine_scores = result.scores()
+    scores_seconds = time.perf_counter() - started
+
+    if engine_scores.tolist() != scores or result.winner.tolist() != winners \
+            or result.points_to_finish.tolist() != lengths:
+        sys.exit("play_points disagrees with the TennisGameDefactored3 loop")
+
+    started = time.perf_counter()
+    simulated = simulate_games(args.probability, args.games, args.points, seed=args.seed)
+    simulate_seconds = time.perf_counter() - started
+    finished_lengths = simulated.points_to_finish[simulated.winner > 0]
+
+    print(f"{args.games} games, results identical to TennisGameDefactored3")
+    print(f"per-object loop      {loop_seconds:8.3f} s")
+    print(f"play_points          {engine_seconds:8.3f} s  ({loop_seconds / engine_seconds:.0f}x)")
+    print(f"play_points + scores {scores_seconds:8.3f} s  ({loop_seconds / scores_seconds:.0f}x)")
+    print(f"simulate_games       {simulate_seconds:8.3f} s  "
+          f"player 1 won {np.mean(simulated.winner == 1):.3%}, "
+          f"{finished_lengths.mean() if len(finished_lengths) else 0.0:.2f} points per game")
+
+
+if __name__ == "__main__":
+    main()
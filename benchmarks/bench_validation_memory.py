@@ -0,0 +1,100 @@
+"""
+Peak RSS of the lab 3 validation strategies as the csv file grows.
+
+For every file size, each strategy runs in a fresh interpreter that reports its peak
+resident set size (ru_maxrss) and the checksum, which must agree between strategies:
+
+* lists    - the whole file read into a list of csv rows before validation,
+* ranges   - validation.find_invalid_rows in one process,
+* mapped   - mapped_validation on the utf-16 file, decoding one row at a time,
+* mapped8  - mapped_validation on a utf-8 copy, matching ASCII cells in place.
+
+Run from the repository root (Linux or macOS):
+
+    python benchmarks/bench_validation_memory.py --rows 25000 100000 400000
+"""
+import argparse
+import csv
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+LAB_3 = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab_3")
+sys.path.insert(0, LAB_3)
+
+from checksum import calculate_checksum  # noqa: E402
+from validation import DELIMITER, compile_patterns  # noqa: E402
+
+STRATEGIES = ("lists", "ranges", "mapped", "mapped8")
+
+
+def read_lists(path: str):
+    """Invalid rows found the naive way, with every row of the file held in memory."""
+    with open(path, encoding="utf-16", newline="") as file:
+        rows = list(csv.reader(file, delimiter=DELIMITER))
+    patterns = compile_patterns(tuple(rows[0]))
+    return [number for number, row in enumerate(rows[1:])
+            if len(row) != len(patterns) or not all(p.fullmatch(value) for p, value in zip(patterns, row))]
+
+
+def measure(strategy: str, path: str) -> None:
+    """Run one strategy in this process and print its peak RSS, time and checksum as JSON."""
+    started = time.perf_counter()
+    if strategy == "lists":
+        rows = read_lists(path)
+    elif strategy == "ranges":
+        from validation import find_invalid_rows
+        rows = find_invalid_rows(path, 1)
+    else:
+        from mapped_validation import iter_invalid_rows
+        rows = list(iter_invalid_rows(path))
+    elapsed = time.perf_counter() - started
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak //= 1024
+    print(json.dumps({"peak_kib": peak, "seconds": elapsed, "checksum": calculate_checksum(rows)}))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[25000, 100000, 400000])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--measure", nargs=2, metavar=("STRATEGY", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        measure(*args.measure)
+        return
+
+    from bench_csv_validation import write_synthetic_csv
+
+    print(f"{'rows':>8} {'MiB':>7} " + " ".join(f"{name:>17}" for name in STRATEGIES))
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.rows:
+            path = os.path.join(directory, f"{rows}.csv")
+            write_synthetic_csv(path, rows, rows // 100, args.seed)
+            with open(path, encoding="utf-16", newline="") as source, \
+                    open(path + ".utf8", "w", encoding="utf-8", newline="") as target:
+                for line in source:
+                    target.write(line)
+
+            results = {}
+            for strategy in STRATEGIES:
+                target = path + ".utf8" if strategy == "mapped8" else path
+                output = subprocess.run([sys.executable, __file__, "--measure", strategy, target],
+                                        check=True, capture_output=True, text=True).stdout
+                results[strategy] = json.loads(output)
+            if len({result["checksum"] for result in results.values()}) != 1:
+                sys.exit(f"{rows} rows: strategies disagree: {results}")
+            print(f"{rows:8} {os.path.getsize(path) / 2 ** 20:7.1f} " + " ".join(
+                f"{results[name]['peak_kib'] / 1024:7.1f} MiB {results[name]['seconds']:5.1f}s"
+                for name in STRATEGIES))
+            os.remove(path)
+            os.remove(path + ".utf8")
+
+
+if __name__ == "__main__":
+    main()
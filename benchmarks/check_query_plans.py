@@ -0,0 +1,72 @@
+"""
+Query-plan regression check for the customer data layer.
+
+Exercises every CustomerDataLayer method against a seeded database, records the
+statements they issue and fails if EXPLAIN QUERY PLAN shows a full table SCAN for any
+of them. Run from the repository root:
+
+    python benchmarks/check_query_plans.py
+"""
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab_1"))
+
+from bench_customer_lookups import seed  # noqa: E402
+from customer_data_access import CustomerDataAccess, CustomerDataLayer  # noqa: E402
+from customer_schema import scanning_statements  # noqa: E402
+from id_allocation import MaxRowIdAllocator  # noqa: E402
+from model_objects import Address, Customer, CustomerType, ShoppingList  # noqa: E402
+
+
+def exercise(conn: sqlite3.Connection) -> None:
+    """Call every data layer entry point at least once, covering the write branches."""
+    layer = CustomerDataLayer(conn)
+    access = CustomerDataAccess(conn)
+    access.load_company_customer("ext-1", "cn-1")
+    access.load_company_customer("missing", "cn-2")
+    access.load_person_customer("ext-3")
+    # Loaded without prefetch, so reading the address goes through the batched load_addresses query.
+    for matches in access.load_company_customers([("ext-1", "cn-1"), ("missing", "cn-2"), ("ext-5", "cn-5")]):
+        matches.customer.address
+    access.load_person_customers(["ext-3", "missing"])
+    access.load_person_customer("ext-6").customer.address
+    customer = layer.customer_from_sql_select_fields(
+        conn.execute('SELECT internalId, externalId, masterExternalId, name, customerType, companyNumber '
+                     'FROM customers WHERE internalId=1').fetchone())
+    customer.address, customer.shoppingLists
+
+    customer = Customer(external_id="new", name="New", customer_type=CustomerType.COMPANY, company_number="cn-new")
+    customer.add_shopping_list(ShoppingList(["item 1", "item 0"]))
+    customer.add_shopping_list(ShoppingList(["brand", "new"]))
+    layer.create_customer_record(customer)
+
+    customer = layer.find_by_external_id("ext-4")
+    customer.name = "Renamed"
+    customer.address = Address("Street", "City", "00000")
+    customer.shoppingLists.pop()
+    customer.add_shopping_list(ShoppingList(["another", "list"]))
+    conn.execute('UPDATE customers SET addressId=NULL WHERE internalId=?', (customer.internalId,))
+    layer.update_customer_record(customer)
+    MaxRowIdAllocator(conn).reserve("customers")
+
+
+def main() -> None:
+    conn = sqlite3.connect(":memory:")
+    seed(conn, 200, 5)
+    statements = []
+    conn.set_trace_callback(statements.append)
+    exercise(conn)
+    conn.set_trace_callback(None)
+
+    scans = scanning_statements(conn, statements)
+    for sql, detail in scans:
+        print(f"{detail}: {sql}")
+    if scans:
+        sys.exit(f"{len(scans)} statement(s) fall back to a full table scan")
+    print(f"{len(set(statements))} distinct statements, no full table scans")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Equivalence check and timing of the table-driven TennisGame scorer.
+
+Compares TennisGame with each TennisGameDefactored implementation on every state up
+to --max-points points per player and on random matches, then times score() after
+every point, both with fixed player names and with a new pair of names per match.
+Run from the repository root:
+
+    python benchmarks/check_tennis_scores.py --max-points 12 --matches 2000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "lab_1"))
+
+from lab1 import (TennisGame, TennisGameDefactored1, TennisGameDefactored2,  # noqa: E402
+                  TennisGameDefactored3)
+
+REFERENCES = (TennisGameDefactored1, TennisGameDefactored2, TennisGameDefactored3)
+NAME_PAIRS = (("player1", "player2"), ("Serena", "Venus"), ("same", "same"), ("", "Advantage"))
+
+
+def compare_states(rules, max_points: int):
+    """Yield a description of every state up to max_points where TennisGame differs from rules."""
+    for player1_name, player2_name in NAME_PAIRS:
+        for p1_points in range(max_points + 1):
+            for p2_points in range(max_points + 1):
+                reference = rules(player1_name, player2_name)
+                game = TennisGame(player1_name, player2_name, rules)
+                for _ in range(p1_points):
+                    reference.won_point(player1_name)
+                    game.won_point(player1_name)
+                for _ in range(p2_points):
+                    reference.won_point(player2_name)
+                    game.won_point(player2_name)
+                if game.score() != reference.score():
+                    yield f"{rules.__name__} {player1_name!r}/{player2_name!r} {p1_points}-{p2_points}: " \
+                          f"{game.score()!r} != {reference.score()!r}"
+
+
+def compare_set_scores(max_points: int):
+    """Yield every state where set_p1_score/set_p2_score differ from TennisGameDefactored2."""
+    for p1_points in range(max_points + 1):
+        for p2_points in range(max_points + 1):
+            reference = TennisGameDefactored2("player1", "player2")
+            game = TennisGame("player1", "player2", TennisGameDefactored2)
+            for target in (reference, game):
+                target.set_p1_score(p1_points)
+                target.set_p2_score(p2_points)
+            if game.score() != reference.score():
+                yield f"set scores {p1_points}-{p2_points}: {game.score()!r} != {reference.score()!r}"
+
+
+def random_matches(matches: int, seed: int):
+    """Build point sequences of random matches, each ending once a player leads by two after four points."""
+    generator = random.Random(seed)
+    result = []
+    for _ in range(matches):
+        points = []
+        p1_points = p2_points = 0
+        while max(p1_points, p2_points) < 4 or abs(p1_points - p2_points) < 2:
+            if generator.random() < 0.5:
+                points.append("player1")
+                p1_points += 1
+            else:
+                points.append("player2")
+                p2_points += 1
+        result.append(points)
+    return result
+
+
+def play(game_class, matches, rules=None, unique_names: bool = False) -> list:
+    """
+    Play every match with score() after each point and return all the scores shown.
+
+    With unique_names every match gets its own pair of player names, as in a live feed.
+    """
+    scores = []
+    for number, points in enumerate(matches):
+        names = (f"home {number}", f"away {number}") if unique_names else ("player1", "player2")
+        game = game_class(*names, rules) if rules else game_class(*names)
+        for player_name in points:
+            game.won_point(names[0] if player_name == "player1" else names[1])
+            scores.append(game.score())
+    return scores
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--max-points", type=int, default=12)
+    parser.add_argument("--matches", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    mismatches = [mismatch for rules in REFERENCES for mismatch in compare_states(rules, args.max_points)]
+    mismatches += list(compare_set_scores(args.max_points))
+    matches = random_matches(args.matches, args.seed)
+    for rules in REFERENCES:
+        if play(TennisGame, matches, rules) != play(rules, matches):
+            mismatches.append(f"{rules.__name__}: random matches differ")
+        if play(TennisGame, matches, rules, True) != play(rules, matches, unique_names=True):
+            mismatches.append(f"{rules.__name__}: random matches with unique names differ")
+    for mismatch in mismatches:
+        print(mismatch)
+    if mismatches:
+        sys.exit(f"{len(mismatches)} mismatch(es)")
+    print(f"TennisGame matches all {len(REFERENCES)} implementations up to {args.max_points} points each")
+
+    points = sum(len(match) for match in matches)
+    for name, game_class, rules in [(rules.__name__, rules, None) for rules in REFERENCES] + \
+                                   [("TennisGame", TennisGame, TennisGameDefactored3)]:
+        timings = []
+        for unique_names in (False, True):
+            started = time.perf_counter()
+            play(game_class, matches, rules, unique_names)
+            timings.append(time.perf_counter() - started)
+        print(f"{name:22} {timings[0] / points * 1e9:8.1f} ns/point, "
+              f"{timings[1] / points * 1e9:8.1f} ns/point with unique names per match")
+
+
+if __name__ == "__main__":
+    main()
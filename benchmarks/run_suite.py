@@ -0,0 +1,291 @@
+"""
+Benchmark suite for the customer data layer, the tennis scorers and the lab 3 checksum pipeline.
+
+Every case runs on deterministic synthetic data: a seeded SQLite customer database with
+configurable customer and shopping list counts, random tennis matches and point streams,
+and a 10-column lab 3 csv file with injected invalid values. Each case is timed as the best
+of --repeat runs and the results are saved as JSON; pass an earlier results file with
+--compare to flag cases that got slower by more than --tolerance. The file is rewritten
+after every case, and a case that raises is recorded as failed without losing the others.
+Groups whose modules cannot be imported (NumPy missing, for instance) are recorded as
+skipped; --smoke runs every case once on tiny data. Run from the repository root:
+
+    python benchmarks/run_suite.py --output baseline.json
+    python benchmarks/run_suite.py --output current.json --compare baseline.json
+    python benchmarks/run_suite.py --smoke --output /tmp/smoke.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import traceback
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple
+
+BENCHMARKS = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS, "..", "lab_1"))
+sys.path.insert(0, os.path.join(BENCHMARKS, "..", "lab_3"))
+
+
+class Case(NamedTuple):
+    """One timed operation: setup() builds fresh state for every repetition, run(state) is what gets timed."""
+    name: str
+    operations: int
+    run: Callable[[Any], Any]
+    setup: Callable[[], Any] = lambda: None
+
+
+def customer_cases(args, directory: str) -> Iterator[Case]:
+    """Lookups, bulk inserts and delta updates against a seeded in-memory customer database."""
+    from bench_customer_lookups import seed
+    from customer_data_access import CustomerDataLayer
+    from model_objects import ShoppingList
+
+    def seeded() -> CustomerDataLayer:
+        conn = sqlite3.connect(":memory:")
+        seed(conn, args.customers, args.lists)
+        return CustomerDataLayer(conn)
+
+    generator = random.Random(args.seed)
+    numbers = [generator.randrange(1, args.customers + 1) for _ in range(args.lookups)]
+    external_ids = [f"ext-{number}" for number in numbers]
+    company_numbers = [f"cn-{number}" for number in numbers]
+    layer = seeded()
+
+    def lookup_full(_):
+        for external_id in external_ids:
+            layer.find_by_external_id(external_id).shoppingLists
+
+    def lookup_row(_):
+        for external_id in external_ids:
+            layer.find_by_external_id(external_id, ())
+
+    def lookup_company(_):
+        for company_number in company_numbers:
+            layer.find_by_company_number(company_number).shoppingLists
+
+    def lookup_batch(_):
+        for customer in layer.find_by_external_ids(external_ids).values():
+            customer.shoppingLists
+
+    def updated_customers():
+        target = seeded()
+        customers = list(target.find_by_external_ids(sorted(set(external_ids))).values())
+        for customer in customers:
+            customer.name += " (renamed)"
+            customer.add_shopping_list(ShoppingList([f"new item {customer.externalId}"]))
+        return target, customers
+
+    def update(state):
+        target, customers = state
+        for customer in customers:
+            target.update_customer_record(customer)
+
+    yield Case("find_by_external_id", args.lookups, lookup_full)
+    yield Case("find_by_external_id row only", args.lookups, lookup_row)
+    yield Case("find_by_company_number", args.lookups, lookup_company)
+    yield Case("find_by_external_ids batch", args.lookups, lookup_batch)
+    yield Case("create_customer_records", args.customers, lambda conn: seed(conn, args.customers, args.lists),
+               lambda: sqlite3.connect(":memory:"))
+    yield Case("update_customer_record", len(set(external_ids)), update, updated_customers)
+
+
+def tennis_cases(args, directory: str) -> Iterator[Case]:
+    """score() after every point of random matches on each scorer, and replay of an interleaved point stream."""
+    from bench_tennis_replay import event_log, players
+    from check_tennis_scores import play, random_matches
+    from lab1 import TennisGame, TennisGameDefactored1, TennisGameDefactored2, TennisGameDefactored3
+    from tennis_replay import replay_points
+
+    matches = random_matches(args.matches, args.seed)
+    points = sum(len(match) for match in matches)
+    for rules in (TennisGameDefactored1, TennisGameDefactored2, TennisGameDefactored3):
+        yield Case(f"{rules.__name__}.score", points, lambda _, rules=rules: play(rules, matches))
+    yield Case("TennisGame.score", points, lambda _: play(TennisGame, matches, TennisGameDefactored3))
+
+    log = list(event_log(args.live, args.events, args.seed))
+    yield Case("replay_points", len(log), lambda _: sum(1 for _ in replay_points(log, players)))
+
+
+def simulation_cases(args, directory: str) -> Iterator[Case]:
+    """Vectorized scoring of random point streams with the NumPy simulation engine."""
+    import numpy as np
+    from tennis_simulation import DEFAULT_MAX_POINTS, play_points, simulate_games
+
+    point_winners = np.random.default_rng(args.seed).random((args.games, DEFAULT_MAX_POINTS)) < 0.55
+    yield Case("play_points + scores", args.games, lambda _: play_points(point_winners).scores())
+    yield Case("simulate_games", args.games, lambda _: simulate_games(0.55, args.games, seed=args.seed))
+
+
+def checksum_cases(args, directory: str) -> Iterator[Case]:
+    """Checksums of row number sets and validation of a synthetic lab 3 csv file by every strategy."""
+    from bench_csv_validation import write_synthetic_csv
+    from checksum import ChecksumBuilder, calculate_checksum
+    from mapped_validation import file_checksum
+    from validation import find_invalid_rows
+    from validation_report import build_report
+
+    generator = random.Random(args.seed)
+    row_numbers = generator.sample(range(args.checksum_rows * 100), args.checksum_rows)
+
+    def build_checksum(_):
+        builder = ChecksumBuilder()
+        for row in row_numbers:
+            builder.add(row)
+        return builder.hexdigest()
+
+    if build_checksum(None) != calculate_checksum(row_numbers):
+        sys.exit("ChecksumBuilder disagrees with calculate_checksum")
+    yield Case("calculate_checksum", len(row_numbers), lambda _: calculate_checksum(row_numbers))
+    yield Case("ChecksumBuilder.add", len(row_numbers), build_checksum)
+
+    path = os.path.join(directory, "synthetic.csv")
+    expected = calculate_checksum(write_synthetic_csv(path, args.rows, args.rows // 100, args.seed))
+    strategies = {
+        "find_invalid_rows": lambda _: calculate_checksum(find_invalid_rows(path, 1)),
+        "mapped file_checksum": lambda _: file_checksum(path)[0],
+        "build_report": lambda _: build_report(path, 1).checksum(),
+    }
+    if (os.cpu_count() or 1) > 1:
+        strategies[f"find_invalid_rows {os.cpu_count()} workers"] = \
+            lambda _: calculate_checksum(find_invalid_rows(path))
+    for name, run in strategies.items():
+        if run(None) != expected:
+            sys.exit(f"{name} reports a wrong checksum for the synthetic csv file")
+        yield Case(name, args.rows, run)
+
+
+GROUPS: Dict[str, Callable[[argparse.Namespace, str], Iterator[Case]]] = {
+    "customers": customer_cases,
+    "tennis": tennis_cases,
+    "simulation": simulation_cases,
+    "checksum": checksum_cases,
+}
+
+# Data sizes of a --smoke run, which only checks that every case works.
+SMOKE_SIZES = {"repeat": 1, "customers": 50, "lists": 3, "lookups": 50, "matches": 50, "live": 10, "events": 1000,
+               "games": 1000, "rows": 2000, "checksum_rows": 1000}
+
+
+def measure(case: Case, repeat: int) -> Dict[str, Any]:
+    """Time a case `repeat` times, each on fresh state from its setup."""
+    timings = []
+    for _ in range(repeat):
+        state = case.setup()
+        started = time.perf_counter()
+        case.run(state)
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    return {"operations": case.operations, "seconds": best, "per_second": case.operations / best if best else None,
+            "timings": timings}
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Return the names of cases more than `tolerance` slower than in the baseline results file."""
+    regressions = []
+    previous = baseline["results"]
+    for name, result in results.items():
+        if name not in previous:
+            continue
+        ratio = result["seconds"] / previous[name]["seconds"]
+        result["baseline_ratio"] = ratio
+        if ratio > 1 + tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def save(path: str, arguments: Dict[str, Any], results: Dict[str, Dict[str, Any]], skipped: Dict[str, str],
+         failed: Dict[str, str]) -> None:
+    """Write the results gathered so far, so that a failing case does not lose the finished ones."""
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "arguments": arguments,
+        },
+        "results": results,
+        "skipped": skipped,
+        "failed": failed,
+    }
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--groups", nargs="+", choices=GROUPS, default=list(GROUPS))
+    parser.add_argument("--output", default="benchmark_results.json", help="where to save the results as JSON")
+    parser.add_argument("--compare", default=None, help="earlier results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown against --compare")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--lists", type=int, default=30)
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--matches", type=int, default=2000)
+    parser.add_argument("--live", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=200000)
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--rows", type=int, default=100000, help="data rows of the synthetic csv file")
+    parser.add_argument("--checksum-rows", type=int, default=1000000)
+    parser.add_argument("--smoke", action="store_true", help="run every case once on tiny data to check it works")
+    args = parser.parse_args()
+    if args.smoke:
+        vars(args).update(SMOKE_SIZES)
+    arguments = {key: value for key, value in vars(args).items() if key not in ("output", "compare", "tolerance")}
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    skipped: Dict[str, str] = {}
+    failed: Dict[str, str] = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for group in args.groups:
+            try:
+                cases = list(GROUPS[group](args, directory))
+            except ImportError as error:
+                skipped[group] = str(error)
+                print(f"{group}: skipped, {error}")
+                continue
+            except Exception as error:
+                traceback.print_exc()
+                failed[group] = f"{type(error).__name__}: {error}"
+                continue
+            for case in cases:
+                name = f"{group}/{case.name}"
+                try:
+                    results[name] = measure(case, args.repeat)
+                except Exception as error:
+                    traceback.print_exc()
+                    failed[name] = f"{type(error).__name__}: {error}"
+                    print(f"{name:48} failed, {failed[name]}")
+                else:
+                    print(f"{name:48} {results[name]['seconds']:9.4f} s {results[name]['per_second']:14.0f} ops/s")
+                save(args.output, arguments, results, skipped, failed)
+
+    regressions = []
+    if baseline is not None:
+        if baseline["meta"]["arguments"] != arguments:
+            print(f"warning: {args.compare} was produced with different arguments")
+        regressions = compare(results, baseline, args.tolerance)
+        for name in regressions:
+            print(f"regression: {name} {results[name]['baseline_ratio']:.2f}x slower than {args.compare}")
+
+    save(args.output, arguments, results, skipped, failed)
+    print(f"results saved to {args.output}")
+    if failed:
+        sys.exit(f"{len(failed)} case(s) failed: {', '.join(failed)}")
+    if regressions:
+        sys.exit(f"{len(regressions)} regression(s) against {args.compare}")
+
+
+if __name__ == "__main__":
+    main()
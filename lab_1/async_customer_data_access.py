@@ -0,0 +1,108 @@
+from concurrent.futures import Executor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Hashable, Sequence
+import asyncio
+
+from customer_data_access import CustomerDataAccess, CustomerMatches
+from customer_schema import PREFETCH_ADDRESS, PREFETCH_SHOPPING_LISTS
+from model_objects import Customer
+
+# Number of calls allowed to run or queue on the executor before callers are held back.
+DEFAULT_MAX_IN_FLIGHT = 64
+
+# Relations loaded on the executor by default: a relation left lazy would run its query on the event loop.
+ASYNC_PREFETCH = (PREFETCH_ADDRESS, PREFETCH_SHOPPING_LISTS)
+
+
+class AsyncCustomerDataAccess:
+    """
+    asyncio front-end for CustomerDataAccess.
+
+    Every call runs on an executor, so the event loop never blocks on SQLite. Concurrent
+    identical lookups are coalesced into one database call whose CustomerMatches is shared
+    by all awaiting callers, and at most max_in_flight calls are handed to the executor
+    at once; further callers wait for a slot.
+
+    The wrapped CustomerDataAccess must be built on a ConnectionPool: its calls run on executor
+    threads, and a plain sqlite3 connection can only be used by the thread that created it.
+    The default executor has one worker per pooled connection.
+
+    Matched customers are returned with their relations already loaded (ASYNC_PREFETCH), so
+    touching them on the event loop never queries the database. Pass a narrower prefetch only
+    for relations the caller will not access.
+    """
+
+    def __init__(self, data_access: CustomerDataAccess, executor: Executor = None,
+                 max_in_flight: int = DEFAULT_MAX_IN_FLIGHT):
+        """
+        :param data_access: Synchronous data access the calls are delegated to, built on a ConnectionPool.
+        :param executor: Executor to run the calls on; one is created and owned when omitted.
+        :param max_in_flight: Maximum number of calls submitted to the executor at once.
+        :raises ValueError: If data_access holds a plain connection instead of a pool.
+        """
+        pool = getattr(data_access.customerDataLayer, "pool", None)
+        if pool is None:
+            raise ValueError("AsyncCustomerDataAccess needs a CustomerDataAccess built with pool=ConnectionPool(...); "
+                             "a plain sqlite3 connection cannot be used from the executor threads")
+        self.data_access = data_access
+        self._owns_executor = executor is None
+        if executor is None:
+            executor = ThreadPoolExecutor(max_workers=pool.max_size, thread_name_prefix="customer-data-access")
+        self.executor = executor
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._lookups: Dict[Hashable, "asyncio.Future[CustomerMatches]"] = {}
+
+    async def load_company_customer(self, external_id: str, company_number: str,
+                                    prefetch: Sequence[str] = ASYNC_PREFETCH) -> CustomerMatches:
+        """
+        Awaitable CustomerDataAccess.load_company_customer, coalescing identical concurrent calls.
+
+        :param prefetch: Relations loaded on the executor along with the match.
+        """
+        prefetch = tuple(prefetch)
+        return await self._single_flight(("company", external_id, company_number, prefetch),
+                                         self.data_access.load_company_customer, external_id, company_number,
+                                         prefetch)
+
+    async def load_person_customer(self, external_id: str,
+                                   prefetch: Sequence[str] = ASYNC_PREFETCH) -> CustomerMatches:
+        """
+        Awaitable CustomerDataAccess.load_person_customer, coalescing identical concurrent calls.
+
+        :param prefetch: Relations loaded on the executor along with the match.
+        """
+        prefetch = tuple(prefetch)
+        return await self._single_flight(("person", external_id, prefetch),
+                                         self.data_access.load_person_customer, external_id, prefetch)
+
+    async def create_customer_record(self, customer: Customer) -> Customer:
+        """Awaitable CustomerDataAccess.create_customer_record."""
+        return await self._run(self.data_access.create_customer_record, customer)
+
+    async def update_customer_record(self, customer: Customer) -> int:
+        """Awaitable CustomerDataAccess.update_customer_record."""
+        return await self._run(self.data_access.update_customer_record, customer)
+
+    async def close(self) -> None:
+        """Shut down the executor if it was created by this object."""
+        if self._owns_executor:
+            await asyncio.get_running_loop().run_in_executor(None, self.executor.shutdown)
+
+    async def _single_flight(self, key: Hashable, func: Callable[..., Any], *args: Any) -> Any:
+        """Join the pending call for key, or start it if there is none."""
+        future = self._lookups.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._run(func, *args))
+            self._lookups[key] = future
+            future.add_done_callback(partial(self._forget, key))
+        # Shielded so that one cancelled caller does not cancel the lookup for the others.
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: "asyncio.Future[Any]") -> None:
+        if self._lookups.get(key) is future:
+            del self._lookups[key]
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking call on the executor once an in-flight slot is free."""
+        async with self._slots:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, partial(func, *args))
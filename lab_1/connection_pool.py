@@ -0,0 +1,93 @@
+from contextlib import contextmanager
+from typing import Callable, Iterator, List, Optional
+import queue
+import sqlite3
+import threading
+
+# Number of connections a ConnectionPool opens at most.
+DEFAULT_POOL_SIZE = 8
+
+
+def file_connection_factory(path: str, timeout: float = 30.0) -> Callable[[], sqlite3.Connection]:
+    """
+    Build a factory of connections to an on-disk database that may be handed between threads.
+
+    :param path: Path of the SQLite database file.
+    :param timeout: Seconds a connection waits for a lock held by another writer.
+    :return: Callable opening a new connection on every call.
+    """
+    return lambda: sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+
+
+class ConnectionPool:
+    """
+    Bounded pool of SQLite connections.
+
+    Connections are opened lazily up to max_size; once all of them are leased, acquire
+    blocks until one is released. With wal enabled every connection switches the database
+    to write-ahead logging, so readers keep running while a writer commits.
+    Connections from the factory must be created with check_same_thread=False.
+    """
+
+    def __init__(self, factory: Callable[[], sqlite3.Connection], max_size: int = DEFAULT_POOL_SIZE,
+                 wal: bool = True, timeout: Optional[float] = None):
+        """
+        :param factory: Callable opening a new connection.
+        :param max_size: Maximum number of open connections.
+        :param wal: Whether to put the database into WAL journal mode.
+        :param timeout: Seconds acquire waits for a free connection, or None to wait forever.
+        """
+        self.factory = factory
+        self.max_size = max_size
+        self.wal = wal
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._all: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+
+    def acquire(self) -> sqlite3.Connection:
+        """Lease a connection, opening a new one while the pool is below max_size."""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._all) < self.max_size:
+                conn = self.open()
+                self._all.append(conn)
+                return conn
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"no connection released within {self.timeout} seconds") from None
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Return a leased connection, rolling back whatever its holder left uncommitted."""
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Lease a connection for the duration of a with block."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def open(self) -> sqlite3.Connection:
+        """Open a connection outside the pool's accounting, configured like the pooled ones."""
+        conn = self.factory()
+        if self.wal:
+            conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def close(self) -> None:
+        """Close every connection the pool has opened."""
+        with self._lock:
+            for conn in self._all:
+                conn.close()
+            self._all.clear()
+            while not self._idle.empty():
+                self._idle.get_nowait()
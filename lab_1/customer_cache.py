@@ -0,0 +1,198 @@
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Iterator, Optional, Sequence, Set, Tuple
+import threading
+import time
+
+from customer_schema import DEFAULT_PREFETCH
+from model_objects import Customer, ShoppingList
+
+# Columns a customer can be looked up by, and therefore cached under.
+CACHE_KEY_COLUMNS = ("externalId", "masterExternalId", "companyNumber")
+
+CacheKey = Tuple[str, str]
+
+
+def customer_cache_keys(customer: Customer) -> Iterator[CacheKey]:
+    """Yield the cache keys a customer can currently be found by."""
+    for column in CACHE_KEY_COLUMNS:
+        value = getattr(customer, column)
+        if value is not None:
+            yield column, value
+
+
+class CustomerCache:
+    """
+    Bounded LRU cache of customer lookups with optional TTL expiry.
+
+    Entries are keyed by (column, value) and also remember misses, so a repeated
+    lookup of an unknown ID does not hit the database either.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        :param max_size: Maximum number of cached lookups before the least recently used one is evicted.
+        :param ttl: Seconds an entry stays valid, or None to keep entries until evicted.
+        :param clock: Monotonic time source, replaceable for deterministic expiry.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[CacheKey, Tuple[Optional[Customer], float]]" = OrderedDict()
+        self._keys_by_id: Dict[int, Set[CacheKey]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, column: str, value: str) -> Tuple[bool, Optional[Customer]]:
+        """
+        Look up a cached result.
+
+        :return: Pair of (found, customer); customer may be None for a cached miss.
+        """
+        key = (column, value)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and entry[1] <= self.clock():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, entry[0]
+
+    def put(self, column: str, value: str, customer: Optional[Customer]) -> None:
+        """Cache the result of a lookup, evicting the least recently used entries when full."""
+        key = (column, value)
+        expires = self.clock() + self.ttl if self.ttl is not None else 0.0
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (customer, expires)
+            if customer is not None:
+                self._keys_by_id.setdefault(customer.internalId, set()).add(key)
+            while len(self._entries) > self.max_size:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, customer: Customer) -> None:
+        """Drop every entry that holds the customer or could now resolve to it."""
+        with self._lock:
+            for key in list(self._keys_by_id.get(customer.internalId, ())):
+                self._remove(key)
+            for key in customer_cache_keys(customer):
+                self._remove(key)
+
+    def clear(self) -> None:
+        """Drop all entries, keeping the counters."""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_id.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Return the hit, miss and eviction counters together with the current size."""
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "size": len(self._entries)}
+
+    def _remove(self, key: CacheKey) -> None:
+        """Remove an entry and its reverse index record; the lock must be held."""
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry[0] is not None:
+            keys = self._keys_by_id.get(entry[0].internalId)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_id[entry[0].internalId]
+
+
+class CachedCustomerDataLayer:
+    """
+    Read-through cache in front of a CustomerDataLayer.
+
+    Cached customers are shared between callers, so treat them as read-only unless the
+    change is persisted through update_customer_record, which invalidates them.
+    Relations that were not prefetched when a customer was cached are loaded on its
+    first access, or on a later lookup that prefetches them.
+    Any other attribute is delegated to the wrapped data layer.
+    """
+
+    def __init__(self, data_layer, cache: CustomerCache):
+        self.data_layer = data_layer
+        self.cache = cache
+
+    def __getattr__(self, name):
+        return getattr(self.data_layer, name)
+
+    def find_one_by(self, column: str, value: str, prefetch: Sequence[str] = DEFAULT_PREFETCH) -> Customer:
+        found, customer = self.cache.get(column, value)
+        if not found:
+            customer = self.data_layer.find_one_by(column, value, prefetch)
+            self.cache.put(column, value, customer)
+        elif customer is not None:
+            self.data_layer.prefetch([customer], prefetch)
+        return customer
+
+    def find_by_external_id(self, external_id: str, prefetch: Sequence[str] = DEFAULT_PREFETCH) -> Customer:
+        return self.find_one_by("externalId", external_id, prefetch)
+
+    def find_by_master_external_id(self, master_external_id: str,
+                                   prefetch: Sequence[str] = DEFAULT_PREFETCH) -> Customer:
+        return self.find_one_by("masterExternalId", master_external_id, prefetch)
+
+    def find_by_company_number(self, company_number: str, prefetch: Sequence[str] = DEFAULT_PREFETCH) -> Customer:
+        return self.find_one_by("companyNumber", company_number, prefetch)
+
+    def find_many_by(self, column: str, values: Iterable[str],
+                     prefetch: Sequence[str] = DEFAULT_PREFETCH) -> Dict[str, Customer]:
+        result = {}
+        missing = []
+        for value in dict.fromkeys(value for value in values if value is not None):
+            found, customer = self.cache.get(column, value)
+            if not found:
+                missing.append(value)
+            elif customer is not None:
+                result[value] = customer
+        self.data_layer.prefetch(list(result.values()), prefetch)
+        loaded = self.data_layer.find_many_by(column, missing, prefetch)
+        for value in missing:
+            self.cache.put(column, value, loaded.get(value))
+        result.update(loaded)
+        return result
+
+    def find_by_external_ids(self, external_ids: Iterable[str],
+                             prefetch: Sequence[str] = DEFAULT_PREFETCH) -> Dict[str, Customer]:
+        return self.find_many_by("externalId", external_ids, prefetch)
+
+    def find_by_master_external_ids(self, master_external_ids: Iterable[str],
+                                    prefetch: Sequence[str] = DEFAULT_PREFETCH) -> Dict[str, Customer]:
+        return self.find_many_by("masterExternalId", master_external_ids, prefetch)
+
+    def find_by_company_numbers(self, company_numbers: Iterable[str],
+                                prefetch: Sequence[str] = DEFAULT_PREFETCH) -> Dict[str, Customer]:
+        return self.find_many_by("companyNumber", company_numbers, prefetch)
+
+    def create_customer_record(self, customer: Customer) -> Customer:
+        self.cache.invalidate(customer)
+        return self.data_layer.create_customer_record(customer)
+
+    def create_customer_records(self, customers: Iterable[Customer], *args, **kwargs) -> int:
+        return self.data_layer.create_customer_records(self._invalidated(customers), *args, **kwargs)
+
+    def update_customer_record(self, customer: Customer) -> int:
+        touched = self.data_layer.update_customer_record(customer)
+        self.cache.invalidate(customer)
+        return touched
+
+    def update_shopping_list(self, shopping_list: ShoppingList) -> None:
+        # Shopping lists are shared by content and linked through update_customer_record,
+        # which invalidates the customers they are attached to.
+        self.data_layer.update_shopping_list(shopping_list)
+
+    def _invalidated(self, customers: Iterable[Customer]) -> Iterator[Customer]:
+        """Invalidate the lookups each customer of a stream would change, as it is consumed."""
+        for customer in customers:
+            self.cache.invalidate(customer)
+            yield customer
@@ -1,6 +1,141 @@
 from model_objects import Customer, ShoppingList, CustomerType, Address
-from typing import List
+from connection_pool import ConnectionPool
+from customer_cache import CachedCustomerDataLayer, CustomerCache
+from customer_schema import (DEFAULT_PREFETCH, PREFETCH_ADDRESS, chunked, ensure_schema, shopping_list_hash,
+                             write_shopping_list_items)
+from id_allocation import IdAllocator, SequenceTableAllocator
+from functools import wraps
+from itertools import islice
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
 import sqlite3
+import threading
+import weakref
+
+# Number of customers written per transaction by CustomerDataLayer.create_customer_records.
+BULK_CHUNK_SIZE = 1000
+
+CUSTOMER_SELECT = (
+    'SELECT c.internalId, c.externalId, c.masterExternalId, c.name, c.customerType, c.companyNumber, '
+    'a.addressId, a.street, a.city, a.postalCode '
+    'FROM customers c LEFT JOIN addresses a ON a.addressId = c.addressId '
+)
+
+# Projection of the customers row only; address and shopping lists are loaded on first access.
+CUSTOMER_ROW_SELECT = (
+    'SELECT c.internalId, c.externalId, c.masterExternalId, c.name, c.customerType, c.companyNumber, '
+    'c.addressId FROM customers c '
+)
+
+# Position of each lookup column within a CUSTOMER_SELECT or CUSTOMER_ROW_SELECT row.
+LOOKUP_COLUMNS = {"externalId": 1, "masterExternalId": 2, "companyNumber": 5}
+
+
+def uses_connection(method):
+    """
+    Run a CustomerDataLayer method on a connection leased from its pool, if it has one.
+
+    Nested calls on the same thread reuse the lease, so a whole operation runs on one
+    connection and inside one transaction.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.pool is None or getattr(self._local, "conn", None) is not None:
+            return method(self, *args, **kwargs)
+        with self.pool.connection() as conn:
+            self._local.conn = conn
+            self._local.cursor = self.open_cursor(conn)
+            try:
+                return method(self, *args, **kwargs)
+            finally:
+                self._local.conn = self._local.cursor = None
+    return wrapper
+
+
+def serialized_write(method):
+    """
+    Run a CustomerDataLayer write method under the layer's write lock.
+
+    SQLite admits one writer at a time anyway; serializing in process keeps the
+    read-then-insert steps (shopping list deduplication) of concurrent writers apart.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._write_lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class LazyCustomer(Customer):
+    """
+    Customer whose address and shopping lists can be loaded from the database on first access.
+
+    Customers hydrated together share one pending load per relation, so touching the
+    address or lists of any of them loads it for all of them with one grouped query.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._address = None
+        self._address_id = None
+        self._pending_address = None
+        self._shopping_lists: List[ShoppingList] = []
+        self._pending_lists = None
+        super().__init__(*args, **kwargs)
+
+    @property
+    def address(self) -> Address:
+        if self._pending_address is not None:
+            self._pending_address.load()
+        return self._address
+
+    @address.setter
+    def address(self, address: Address) -> None:
+        self._pending_address = None
+        self._address = address
+
+    @property
+    def shoppingLists(self) -> List[ShoppingList]:
+        if self._pending_lists is not None:
+            self._pending_lists.load()
+        return self._shopping_lists
+
+    @shoppingLists.setter
+    def shoppingLists(self, shopping_lists: List[ShoppingList]) -> None:
+        self._pending_lists = None
+        self._shopping_lists = shopping_lists
+
+
+class PendingLoad:
+    """
+    A relation not yet loaded for a group of LazyCustomer objects.
+
+    The group is held by weak references, so a customer kept alive, for instance by a
+    CustomerCache, does not keep the rest of its batch in memory.
+
+    Cached customers can be shared between threads, so the load runs under a lock: a thread
+    touching the relation while another one loads it waits for the result.
+    """
+
+    def __init__(self, slot: str, loader: Callable[[List[LazyCustomer]], None], customers: List[LazyCustomer]):
+        """
+        :param slot: LazyCustomer attribute holding the pending load, "_pending_address" or "_pending_lists".
+        :param loader: Data layer method loading the relation for a list of customers.
+        :param customers: Customers of the group.
+        """
+        self.slot = slot
+        self.loader = loader
+        self.customers = [weakref.ref(customer) for customer in customers]
+        self._lock = threading.Lock()
+        for customer in customers:
+            setattr(customer, slot, self)
+
+    def load(self) -> None:
+        """Load the relation for every live customer of the group that still waits for it."""
+        with self._lock:
+            customers = [customer for customer in (ref() for ref in self.customers)
+                         if customer is not None and getattr(customer, self.slot) is self]
+            if customers:
+                self.loader(customers)
+            self.customers = []
 
 
 class CustomerMatches:
@@ -19,80 +154,220 @@ class CustomerMatches:
 
 
 class CustomerDataAccess:
-    def __init__(self, db: sqlite3.Connection):
-        self.customerDataLayer = CustomerDataLayer(db)
+    def __init__(self, db: sqlite3.Connection = None, cache: CustomerCache = None, pool: ConnectionPool = None):
+        """
+        :param db: Connection to the customer database, unless a pool is given.
+        :param cache: Optional cache of customer lookups, invalidated by the write methods.
+        :param pool: Optional connection pool, making the object safe to share between threads.
+        """
+        self.customerDataLayer = CustomerDataLayer(db, pool=pool)
+        if cache is not None:
+            self.customerDataLayer = CachedCustomerDataLayer(self.customerDataLayer, cache)
 
-    def load_company_customer(self, external_id: str, company_number: str) -> CustomerMatches:
+    def load_company_customer(self, external_id: str, company_number: str,
+                              prefetch: Sequence[str] = ()) -> CustomerMatches:
         """
         Load a company customer by external ID or company number.
+
+        Matching needs the customers rows only, so by default every lookup is one query
+        and the address and shopping lists are loaded when first accessed.
         
         :param external_id: External identifier for the customer.
         :param company_number: Unique company number.
+        :param prefetch: Relations to load eagerly: PREFETCH_ADDRESS and/or PREFETCH_SHOPPING_LISTS.
         :return: CustomerMatches object containing matched customer and any duplicates.
         """
         matches = CustomerMatches()
-        match_by_external_id = self.customerDataLayer.find_by_external_id(external_id)
+        match_by_external_id = self.customerDataLayer.find_by_external_id(external_id, prefetch)
         
         if match_by_external_id:
             matches.customer = match_by_external_id
             matches.matchTerm = "ExternalId"
-            match_by_master_id = self.customerDataLayer.find_by_master_external_id(external_id)
+            match_by_master_id = self.customerDataLayer.find_by_master_external_id(external_id, prefetch)
             if match_by_master_id:
                 matches.add_duplicate(match_by_master_id)
         else:
-            match_by_company_number = self.customerDataLayer.find_by_company_number(company_number)
+            match_by_company_number = self.customerDataLayer.find_by_company_number(company_number, prefetch)
             if match_by_company_number:
                 matches.customer = match_by_company_number
                 matches.matchTerm = "CompanyNumber"
 
         return matches
 
-    def load_person_customer(self, external_id: str) -> CustomerMatches:
+    def load_person_customer(self, external_id: str, prefetch: Sequence[str] = ()) -> CustomerMatches:
         """
         Load an individual customer by external ID.
         
         :param external_id: External identifier for the customer.
+        :param prefetch: Relations to load eagerly, as for load_company_customer.
         :return: CustomerMatches object containing matched customer.
         """
         matches = CustomerMatches()
-        match_by_personal_number = self.customerDataLayer.find_by_external_id(external_id)
+        match_by_personal_number = self.customerDataLayer.find_by_external_id(external_id, prefetch)
         matches.customer = match_by_personal_number
         if match_by_personal_number:
             matches.matchTerm = "ExternalId"
         return matches
 
-    def update_customer_record(self, customer: Customer) -> None:
-        """Update an existing customer record."""
-        self.customerDataLayer.update_customer_record(customer)
+    def load_company_customers(self, keys: Iterable[Tuple[str, str]],
+                               prefetch: Sequence[str] = ()) -> List[CustomerMatches]:
+        """
+        Load many company customers at once, with the same matching rules as load_company_customer.
+
+        :param keys: Pairs of (external ID, company number), one per record to match.
+        :param prefetch: Relations to load eagerly, as for load_company_customer.
+        :return: CustomerMatches object per input pair, in input order.
+        """
+        keys = list(keys)
+        external_ids = [external_id for external_id, _ in keys]
+        by_external_id = self.customerDataLayer.find_by_external_ids(external_ids, prefetch)
+        by_master_id = self.customerDataLayer.find_by_master_external_ids(
+            [external_id for external_id in external_ids if external_id in by_external_id], prefetch)
+        by_company_number = self.customerDataLayer.find_by_company_numbers(
+            [company_number for external_id, company_number in keys if external_id not in by_external_id], prefetch)
+
+        result = []
+        for external_id, company_number in keys:
+            matches = CustomerMatches()
+            if external_id in by_external_id:
+                matches.customer = by_external_id[external_id]
+                matches.matchTerm = "ExternalId"
+                if external_id in by_master_id:
+                    matches.add_duplicate(by_master_id[external_id])
+            elif company_number in by_company_number:
+                matches.customer = by_company_number[company_number]
+                matches.matchTerm = "CompanyNumber"
+            result.append(matches)
+        return result
+
+    def load_person_customers(self, external_ids: Iterable[str], prefetch: Sequence[str] = ()) -> List[CustomerMatches]:
+        """
+        Load many individual customers at once, with the same matching rules as load_person_customer.
+
+        :param external_ids: External identifiers, one per record to match.
+        :param prefetch: Relations to load eagerly, as for load_company_customer.
+        :return: CustomerMatches object per input ID, in input order.
+        """
+        external_ids = list(external_ids)
+        by_external_id = self.customerDataLayer.find_by_external_ids(external_ids, prefetch)
+        result = []
+        for external_id in external_ids:
+            matches = CustomerMatches()
+            matches.customer = by_external_id.get(external_id)
+            if matches.customer:
+                matches.matchTerm = "ExternalId"
+            result.append(matches)
+        return result
+
+    def update_customer_record(self, customer: Customer) -> int:
+        """Update an existing customer record and return the number of rows written."""
+        return self.customerDataLayer.update_customer_record(customer)
 
     def create_customer_record(self, customer: Customer) -> Customer:
         """Create a new customer record."""
         return self.customerDataLayer.create_customer_record(customer)
 
+    def create_customer_records(self, customers: Iterable[Customer], chunk_size: int = BULK_CHUNK_SIZE) -> int:
+        """Create many customer records, committing once per chunk."""
+        return self.customerDataLayer.create_customer_records(customers, chunk_size)
+
     def update_shopping_list(self, customer: Customer, shopping_list: ShoppingList) -> None:
         """Add a shopping list to the customer and update the database."""
         customer.add_shopping_list(shopping_list)
         self.customerDataLayer.update_shopping_list(shopping_list)
         self.customerDataLayer.update_customer_record(customer)
 
+    def close(self) -> None:
+        """Release the connections the data layer opened itself, see CustomerDataLayer.close."""
+        self.customerDataLayer.close()
+
 
 class CustomerDataLayer:
-    def __init__(self, conn: sqlite3.Connection):
-        self.conn = conn
-        self.cursor = self.conn.cursor()
+    def __init__(self, conn: sqlite3.Connection = None, id_allocator: IdAllocator = None,
+                 pool: ConnectionPool = None):
+        """
+        :param conn: Connection used for every call, unless a pool is given.
+        :param id_allocator: Source of new IDs; defaults to a SequenceTableAllocator.
+        :param pool: Pool to lease a connection from per call, which makes the layer thread-safe.
+        """
+        self.pool = pool
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        # Connection opened for the default allocator in pooled mode, closed by close().
+        self._allocator_conn = None
+        if pool is None:
+            self._conn = conn
+            self._cursor = conn.cursor()
+            ensure_schema(conn)
+            self.id_allocator = id_allocator or SequenceTableAllocator(conn)
+        else:
+            with pool.connection() as pooled:
+                ensure_schema(pooled)
+            if id_allocator is None:
+                # Blocks are claimed and committed on their own connection, outside callers' transactions.
+                self._allocator_conn = pool.open()
+                id_allocator = SequenceTableAllocator(self._allocator_conn)
+            self.id_allocator = id_allocator
 
-    def find_by_external_id(self, external_id: str) -> Customer:
+    def close(self) -> None:
+        """
+        Close the connection the layer opened for its ID allocator, if any.
+
+        The connection or pool the layer was given stays open; closing it is up to its owner.
+        """
+        if self._allocator_conn is not None:
+            self._allocator_conn.close()
+            self._allocator_conn = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Connection of the current call: the fixed one, or the one leased by this thread."""
+        return self._conn if self.pool is None else self._local.conn
+
+    @property
+    def cursor(self) -> sqlite3.Cursor:
+        """Cursor of the current call, never shared between threads in pooled mode."""
+        return self._cursor if self.pool is None else self._local.cursor
+
+    def open_cursor(self, conn: sqlite3.Connection) -> sqlite3.Cursor:
+        """Open the cursor a pooled call runs its statements on."""
+        return conn.cursor()
+
+    @uses_connection
+    def find_by_external_id(self, external_id: str, prefetch: Sequence[str] = DEFAULT_PREFETCH) -> Customer:
         """
         Find a customer by external ID.
         
         :param external_id: External identifier for the customer.
+        :param prefetch: Relations to load eagerly, see find_one_by.
         :return: Customer object if found, else None.
         """
-        self.cursor.execute(
-            'SELECT internalId, externalId, masterExternalId, name, customerType, companyNumber FROM customers WHERE externalId=?',
-            (external_id,))
-        return self.customer_from_sql_select_fields(self.cursor.fetchone())
+        return self.find_one_by("externalId", external_id, prefetch)
 
+    @uses_connection
+    def find_one_by(self, column: str, value: str, prefetch: Sequence[str] = DEFAULT_PREFETCH) -> Customer:
+        """
+        Find a customer by a single column.
+
+        The customers row is always read with one query, joined with the address if it is
+        prefetched. Relations that are not prefetched are loaded on first access, with one
+        more query each regardless of the number of shopping lists.
+
+        :param column: Name of the customers column to filter on.
+        :param value: Value the column must be equal to.
+        :param prefetch: Relations to load eagerly: PREFETCH_ADDRESS and/or PREFETCH_SHOPPING_LISTS.
+        :return: Customer object if found, else None.
+        """
+        select = CUSTOMER_SELECT if PREFETCH_ADDRESS in prefetch else CUSTOMER_ROW_SELECT
+        self.cursor.execute(select + f'WHERE c.{column}=?', (value,))
+        fields = self.cursor.fetchone()
+        if not fields:
+            return None
+        customer = self.customers_from_sql_rows([fields])[0]
+        self.prefetch([customer], prefetch)
+        return customer
+
+    @uses_connection
     def find_address_id(self, customer: Customer) -> int:
         """
         Find the address ID for a given customer.
@@ -104,59 +379,225 @@ class CustomerDataLayer:
         result = self.cursor.fetchone()
         return int(result[0]) if result else 0
 
+    @uses_connection
     def customer_from_sql_select_fields(self, fields: tuple) -> Customer:
         """
         Map SQL select fields to a Customer object.
+
+        A row of the six customers columns alone is mapped to a LazyCustomer as well: its
+        address is looked up by internal ID, and its shopping lists loaded, on first access.
         
         :param fields: Tuple of fields returned from a SQL query.
         :return: Customer object if fields are valid, else None.
         """
         if not fields:
             return None
+        if len(fields) == 6:
+            customer = self._customer_from_row(fields, LazyCustomer)
+            PendingLoad("_pending_address", self.load_addresses_by_customer_id, [customer])
+            PendingLoad("_pending_lists", self.load_shopping_lists, [customer])
+            return customer
+        return self.customers_from_sql_rows([fields])[0]
+
+    @uses_connection
+    def customers_from_sql_rows(self, rows: List[tuple]) -> List[Customer]:
+        """
+        Map rows selected with CUSTOMER_SELECT or CUSTOMER_ROW_SELECT to Customer objects.
+
+        The address comes from the joined columns of a CUSTOMER_SELECT row; otherwise it is
+        loaded for all the customers at once when the address of any of them is first
+        accessed. Shopping lists are always loaded that way.
+
+        :param rows: Rows holding the customer columns followed by the address ID or joined address columns.
+        :return: List of Customer objects in the order of the rows.
+        """
+        customers = []
+        unloaded_addresses = []
+        for fields in rows:
+            customer = self._customer_from_row(fields, LazyCustomer)
+            customer._address_id = fields[6]
+            if len(fields) > 7:
+                if fields[6]:
+                    customer.address = Address(*fields[7:10])
+            elif fields[6]:
+                unloaded_addresses.append(customer)
+            customers.append(customer)
+        PendingLoad("_pending_address", self.load_addresses, unloaded_addresses)
+        PendingLoad("_pending_lists", self.load_shopping_lists, customers)
+        return customers
+
+    def prefetch(self, customers: List[Customer], relations: Sequence[str]) -> None:
+        """
+        Load the given relations of customers now instead of on first access.
+
+        :param customers: Customers to load the relations of.
+        :param relations: PREFETCH_ADDRESS and/or PREFETCH_SHOPPING_LISTS.
+        """
+        for relation in relations:
+            for customer in customers:
+                getattr(customer, relation)
+
+    @uses_connection
+    def load_addresses(self, customers: List[LazyCustomer]) -> None:
+        """
+        Attach addresses to customers hydrated without them, using grouped IN lookups.
+
+        :param customers: Customers whose address is to be loaded.
+        """
+        address_ids = list(dict.fromkeys(customer._address_id for customer in customers if customer._address_id))
+        addresses = {}
+        for chunk in chunked(address_ids):
+            placeholders = ", ".join("?" * len(chunk))
+            self.cursor.execute(
+                f'SELECT addressId, street, city, postalCode FROM addresses WHERE addressId IN ({placeholders})',
+                tuple(chunk))
+            for address_id, street, city, postal_code in self.cursor.fetchall():
+                addresses[address_id] = (street, city, postal_code)
+        for customer in customers:
+            fields = addresses.get(customer._address_id)
+            customer.address = Address(*fields) if fields else None
+
+    @uses_connection
+    def load_addresses_by_customer_id(self, customers: List[LazyCustomer]) -> None:
+        """
+        Attach addresses to customers hydrated without their address ID, joining it from the customers table.
+
+        :param customers: Customers whose address is to be loaded.
+        """
+        addresses = {}
+        for chunk in chunked(list(dict.fromkeys(customer.internalId for customer in customers))):
+            placeholders = ", ".join("?" * len(chunk))
+            self.cursor.execute(
+                'SELECT c.internalId, a.street, a.city, a.postalCode FROM customers c '
+                f'JOIN addresses a ON a.addressId = c.addressId WHERE c.internalId IN ({placeholders})',
+                tuple(chunk))
+            for internal_id, street, city, postal_code in self.cursor.fetchall():
+                addresses[internal_id] = (street, city, postal_code)
+        for customer in customers:
+            fields = addresses.get(customer.internalId)
+            customer.address = Address(*fields) if fields else None
+
+    @uses_connection
+    def load_shopping_lists(self, customers: List[Customer]) -> None:
+        """
+        Attach shopping lists to the given customers using grouped IN lookups.
+
+        :param customers: Customers whose shopping lists are to be loaded.
+        """
+        products_by_customer = self.fetch_shopping_lists([customer.internalId for customer in customers])
+        for customer in customers:
+            lists = [ShoppingList(list(products)) for products in products_by_customer.get(customer.internalId, ())]
+            if isinstance(customer, LazyCustomer):
+                # Assigned whole, so another thread never sees the lists half filled.
+                customer.shoppingLists = lists
+            else:
+                for shopping_list in lists:
+                    customer.add_shopping_list(shopping_list)
+
+    @uses_connection
+    def fetch_shopping_lists(self, customer_ids: Iterable[int]) -> Dict[int, List[List[str]]]:
+        """
+        Read the ordered products of every shopping list linked to the given customers.
+
+        :param customer_ids: Internal IDs of the customers.
+        :return: Mapping of customer ID to its lists, in link order, each a list of products.
+        """
+        lists: Dict[int, List[List[str]]] = {}
+        for chunk in chunked(list(dict.fromkeys(customer_ids))):
+            placeholders = ", ".join("?" * len(chunk))
+            self.cursor.execute(
+                'SELECT cs.rowid, cs.customerId, p.name FROM customer_shoppinglists cs '
+                'LEFT JOIN shoppinglist_items i ON i.shoppinglistId = cs.shoppinglistId '
+                'LEFT JOIN products p ON p.productId = i.productId '
+                f'WHERE cs.customerId IN ({placeholders}) ORDER BY cs.rowid, i.position',
+                tuple(chunk))
+            link = None
+            for link_rowid, customer_id, product in self.cursor.fetchall():
+                if link_rowid != link:
+                    link = link_rowid
+                    products: List[str] = []
+                    lists.setdefault(customer_id, []).append(products)
+                if product is not None:
+                    products.append(product)
+        return lists
 
-        customer = Customer(
+    def _customer_from_row(self, fields: tuple, customer_class: type = Customer) -> Customer:
+        """Build a Customer from the leading customers columns of a row."""
+        return customer_class(
             internal_id=fields[0], external_id=fields[1], master_external_id=fields[2],
             name=fields[3], customer_type=CustomerType(fields[4]), company_number=fields[5]
         )
-        
-        address_id = self.find_address_id(customer)
-        if address_id:
-            self.cursor.execute('SELECT street, city, postalCode FROM addresses WHERE addressId=?', (address_id,))
-            addresses = self.cursor.fetchone()
-            if addresses:
-                customer.address = Address(*addresses)
-
-        self.cursor.execute('SELECT shoppinglistId FROM customer_shoppinglists WHERE customerId=?', (customer.internalId,))
-        for (shopping_list_id,) in self.cursor.fetchall():
-            self.cursor.execute('SELECT products FROM shoppinglists WHERE shoppinglistId=?', (shopping_list_id,))
-            products = self.cursor.fetchone()[0].split(", ")
-            customer.add_shopping_list(ShoppingList(products))
-        return customer
 
-    def find_by_master_external_id(self, master_external_id: str) -> Customer:
+    @uses_connection
+    def find_by_master_external_id(self, master_external_id: str,
+                                   prefetch: Sequence[str] = DEFAULT_PREFETCH) -> Customer:
         """
         Find a customer by master external ID.
         
         :param master_external_id: Master external identifier for the customer.
+        :param prefetch: Relations to load eagerly, see find_one_by.
         :return: Customer object if found, else None.
         """
-        self.cursor.execute(
-            'SELECT internalId, externalId, masterExternalId, name, customerType, companyNumber FROM customers WHERE masterExternalId=?',
-            (master_external_id,))
-        return self.customer_from_sql_select_fields(self.cursor.fetchone())
+        return self.find_one_by("masterExternalId", master_external_id, prefetch)
 
-    def find_by_company_number(self, company_number: str) -> Customer:
+    @uses_connection
+    def find_by_company_number(self, company_number: str, prefetch: Sequence[str] = DEFAULT_PREFETCH) -> Customer:
         """
         Find a customer by company number.
         
         :param company_number: Unique company number.
+        :param prefetch: Relations to load eagerly, see find_one_by.
         :return: Customer object if found, else None.
         """
-        self.cursor.execute(
-            'SELECT internalId, externalId, masterExternalId, name, customerType, companyNumber FROM customers WHERE companyNumber=?',
-            (company_number,))
-        return self.customer_from_sql_select_fields(self.cursor.fetchone())
+        return self.find_one_by("companyNumber", company_number, prefetch)
+
+    @uses_connection
+    def find_many_by(self, column: str, values: Iterable[str],
+                     prefetch: Sequence[str] = DEFAULT_PREFETCH) -> Dict[str, Customer]:
+        """
+        Find customers for many values of a single column using chunked IN (...) queries.
+
+        For every value the first matching row wins, as with find_one_by.
 
+        :param column: Name of the customers column to filter on.
+        :param values: Values to look up; duplicates and None are ignored.
+        :param prefetch: Relations to load eagerly, see find_one_by.
+        :return: Mapping of value to hydrated Customer for the values that matched.
+        """
+        keys = list(dict.fromkeys(value for value in values if value is not None))
+        position = LOOKUP_COLUMNS[column]
+        select = CUSTOMER_SELECT if PREFETCH_ADDRESS in prefetch else CUSTOMER_ROW_SELECT
+        rows = {}
+        for chunk in chunked(keys):
+            placeholders = ", ".join("?" * len(chunk))
+            self.cursor.execute(
+                select + f'WHERE c.{column} IN ({placeholders}) ORDER BY c.rowid', tuple(chunk))
+            for fields in self.cursor.fetchall():
+                rows.setdefault(fields[position], fields)
+        customers = self.customers_from_sql_rows(list(rows.values()))
+        self.prefetch(customers, prefetch)
+        return dict(zip(rows, customers))
+
+    @uses_connection
+    def find_by_external_ids(self, external_ids: Iterable[str],
+                             prefetch: Sequence[str] = DEFAULT_PREFETCH) -> Dict[str, Customer]:
+        """Find customers by many external IDs, keyed by external ID."""
+        return self.find_many_by("externalId", external_ids, prefetch)
+
+    @uses_connection
+    def find_by_master_external_ids(self, master_external_ids: Iterable[str],
+                                    prefetch: Sequence[str] = DEFAULT_PREFETCH) -> Dict[str, Customer]:
+        """Find customers by many master external IDs, keyed by master external ID."""
+        return self.find_many_by("masterExternalId", master_external_ids, prefetch)
+
+    @uses_connection
+    def find_by_company_numbers(self, company_numbers: Iterable[str],
+                                prefetch: Sequence[str] = DEFAULT_PREFETCH) -> Dict[str, Customer]:
+        """Find customers by many company numbers, keyed by company number."""
+        return self.find_many_by("companyNumber", company_numbers, prefetch)
+
+    @serialized_write
+    @uses_connection
     def create_customer_record(self, customer: Customer) -> Customer:
         """
         Create a new customer record in the database.
@@ -164,77 +605,166 @@ class CustomerDataLayer:
         :param customer: Customer object containing data for the new record.
         :return: The created Customer object.
         """
-        customer.internalId = self.next_id("customers")
-        self.cursor.execute(
-            'INSERT INTO customers VALUES (?, ?, ?, ?, ?, ?, ?);',
-            (customer.internalId, customer.externalId, customer.masterExternalId, customer.name,
-             customer.customerType.value, customer.companyNumber, None)
-        )
-        
-        if customer.address:
-            address_id = self.next_id("addresses")
+        self.create_customer_records([customer])
+        return customer
+
+    @serialized_write
+    @uses_connection
+    def create_customer_records(self, customers: Iterable[Customer], chunk_size: int = BULK_CHUNK_SIZE) -> int:
+        """
+        Create many customer records, committing once per chunk.
+
+        The input is consumed lazily, so a generator of any length is written in bounded memory.
+        Every chunk takes its IDs from one in-memory allocator, deduplicates its shopping lists
+        before touching the database and is written with executemany.
+
+        :param customers: Customer objects containing data for the new records; their IDs are set in place.
+        :param chunk_size: Number of customers written per transaction.
+        :return: Number of created records.
+        """
+        iterator = iter(customers)
+        created = 0
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                return created
+            self._insert_customers(chunk)
+            self.conn.commit()
+            created += len(chunk)
+
+    def _insert_customers(self, customers: List[Customer]) -> None:
+        """Insert a chunk of customers with their addresses and shopping list links, without committing."""
+        customer_id = self.next_id("customers", len(customers))
+        address_id = self.next_id("addresses", sum(1 for customer in customers if customer.address))
+        customer_rows = []
+        address_rows = []
+        for customer in customers:
+            customer.internalId = customer_id
+            customer_id += 1
+            customer_address_id = None
+            if customer.address:
+                customer_address_id = address_id
+                address_id += 1
+                address_rows.append((customer_address_id, customer.address.street, customer.address.city,
+                                     customer.address.postalCode))
+            customer_rows.append((customer.internalId, customer.externalId, customer.masterExternalId, customer.name,
+                                  customer.customerType.value, customer.companyNumber, customer_address_id))
+
+        shopping_list_ids = self.shopping_list_ids(
+            sl.products for customer in customers for sl in customer.shoppingLists)
+        link_rows = [(customer.internalId, shopping_list_ids[tuple(sl.products)])
+                     for customer in customers for sl in customer.shoppingLists]
+
+        self.cursor.executemany('INSERT INTO addresses VALUES (?, ?, ?, ?)', address_rows)
+        self.cursor.executemany('INSERT INTO customers VALUES (?, ?, ?, ?, ?, ?, ?);', customer_rows)
+        self.cursor.executemany('INSERT INTO customer_shoppinglists VALUES (?, ?)', link_rows)
+
+    @uses_connection
+    def shopping_list_ids(self, lists: Iterable[Sequence[str]]) -> Dict[Tuple[str, ...], int]:
+        """
+        Resolve shopping list contents to shopping list IDs, inserting the lists that do not exist yet.
+
+        :param lists: Ordered products of each list; equal lists are looked up and inserted only once.
+        :return: Mapping of the products tuple to shopping list ID.
+        """
+        return self._resolve_shopping_lists(lists)[0]
+
+    def _resolve_shopping_lists(self, lists: Iterable[Sequence[str]]) -> Tuple[Dict[Tuple[str, ...], int], int]:
+        """Resolve shopping list contents to IDs by content hash and count the newly inserted lists."""
+        by_hash = {shopping_list_hash(products): products for products in dict.fromkeys(map(tuple, lists))}
+        ids: Dict[Tuple[str, ...], int] = {}
+        for chunk in chunked(list(by_hash)):
+            placeholders = ", ".join("?" * len(chunk))
             self.cursor.execute(
-                'INSERT INTO addresses VALUES (?, ?, ?, ?)',
-                (address_id, customer.address.street, customer.address.city, customer.address.postalCode)
-            )
-            self.cursor.execute('UPDATE customers set addressId=? WHERE internalId=?', (address_id, customer.internalId))
-
-        if customer.shoppingLists:
-            for sl in customer.shoppingLists:
-                data = ", ".join(sl)
-                self.cursor.execute('SELECT shoppinglistId FROM shoppinglists WHERE products=?', (data,))
-                shopping_list_id = self.cursor.fetchone()
-                if not shopping_list_id:
-                    shopping_list_id = self.next_id("shoppinglists")
-                    self.cursor.execute('INSERT INTO shoppinglists VALUES (?, ?)', (shopping_list_id, data))
-                self.cursor.execute('INSERT INTO customer_shoppinglists VALUES (?, ?)', (customer.internalId, shopping_list_id))
+                'SELECT contentHash, shoppinglistId FROM shoppinglists '
+                f'WHERE contentHash IN ({placeholders}) ORDER BY shoppinglistId',
+                tuple(chunk))
+            for content_hash, shopping_list_id in self.cursor.fetchall():
+                ids.setdefault(by_hash[content_hash], shopping_list_id)
 
-        self.conn.commit()
-        return customer
+        missing = [content_hash for content_hash, products in by_hash.items() if products not in ids]
+        if missing:
+            next_list_id = self.next_id("shoppinglists", len(missing))
+            for offset, content_hash in enumerate(missing):
+                ids[by_hash[content_hash]] = next_list_id + offset
+            self.cursor.executemany(
+                'INSERT INTO shoppinglists (shoppinglistId, contentHash) VALUES (?, ?)',
+                [(ids[by_hash[content_hash]], content_hash) for content_hash in missing])
+            write_shopping_list_items(self.cursor, [(ids[by_hash[content_hash]], by_hash[content_hash])
+                                                    for content_hash in missing])
+        return ids, len(missing)
 
-    def next_id(self, table_name: str) -> int:
-        """Generate the next unique ID for a specified table."""
-        self.cursor.execute(f'SELECT MAX(ROWID) AS max_id FROM {table_name};')
-        old_id = self.cursor.fetchone()[0]
-        return int(old_id) + 1 if old_id else 1
+    def next_id(self, table_name: str, count: int = 1) -> int:
+        """
+        Reserve consecutive unique IDs for a specified table.
+
+        :param table_name: Table the IDs are meant for.
+        :param count: Number of consecutive IDs to reserve.
+        :return: The first reserved ID.
+        """
+        return self.id_allocator.reserve(table_name, count)
 
-    def update_customer_record(self, customer: Customer) -> None:
+    @serialized_write
+    @uses_connection
+    def update_customer_record(self, customer: Customer) -> int:
         """
         Update an existing customer record in the database.
-        
+
+        Only the difference to the persisted state is written: the customers row is updated
+        when a scalar field changed, and the shopping list links that match the saved lists
+        up to the first difference are kept, while the rest are deleted and inserted again
+        in order. Appending a list therefore writes one link.
+
         :param customer: Customer object containing updated data.
+        :return: Number of customer, address, shopping list and link rows written.
         """
         self.cursor.execute(
-            'UPDATE customers SET externalId=?, masterExternalId=?, name=?, customerType=?, companyNumber=? WHERE internalId=?',
-            (customer.externalId, customer.masterExternalId, customer.name, customer.customerType.value,
-             customer.companyNumber, customer.internalId)
-        )
-        
-        if customer.address:
-            address_id = self.find_address_id(customer)
-            if not address_id:
-                address_id = self.next_id("addresses")
-                self.cursor.execute(
-                    'INSERT INTO addresses VALUES (?, ?, ?, ?)',
-                    (address_id, customer.address.street, customer.address.city, customer.address.postalCode)
-                )
-                self.cursor.execute('UPDATE customers set addressId=? WHERE internalId=?', (address_id, customer.internalId))
-
-        self.cursor.execute('DELETE FROM customer_shoppinglists WHERE customerId=?', (customer.internalId,))
-        if customer.shoppingLists:
-            for sl in customer.shoppingLists:
-                products = ", ".join(sl.products)
-                self.cursor.execute('SELECT shoppinglistId FROM shoppinglists WHERE products=?', (products,))
-                shopping_list_ids = self.cursor.fetchone()
-                if shopping_list_ids:
-                    self.cursor.execute('INSERT INTO customer_shoppinglists VALUES (?, ?)', (customer.internalId, shopping_list_ids[0]))
-                else:
-                    shoppinglist_id = self.next_id("shoppinglists")
-                    self.cursor.execute('INSERT INTO shoppinglists VALUES (?, ?)', (shoppinglist_id, products))
-                    self.cursor.execute('INSERT INTO customer_shoppinglists VALUES (?, ?)',
-                                        (customer.internalId, shoppinglist_id))
+            'SELECT externalId, masterExternalId, name, customerType, companyNumber, addressId '
+            'FROM customers WHERE internalId=?', (customer.internalId,))
+        persisted = self.cursor.fetchone()
+        scalars = (customer.externalId, customer.masterExternalId, customer.name, customer.customerType.value,
+                   customer.companyNumber)
+        address_id = persisted[5] if persisted else 0
+        new_address_id = self.next_id("addresses") if customer.address and not address_id else 0
+
+        shopping_list_ids, touched = self._resolve_shopping_lists(sl.products for sl in customer.shoppingLists)
+        list_order = [shopping_list_ids[tuple(sl.products)] for sl in customer.shoppingLists]
+        self.cursor.execute(
+            'SELECT rowid, shoppinglistId FROM customer_shoppinglists WHERE customerId=? ORDER BY rowid',
+            (customer.internalId,))
+        links = self.cursor.fetchall()
+        # Lists are hydrated in link rowid order, so the links from the first difference on are rewritten.
+        kept = 0
+        while kept < min(len(links), len(list_order)) and links[kept][1] == list_order[kept]:
+            kept += 1
+        stale_links = [(link_rowid,) for link_rowid, _ in links[kept:]]
+        new_links = [(customer.internalId, shopping_list_id) for shopping_list_id in list_order[kept:]]
+
+        if persisted is None or tuple(persisted[:5]) != scalars:
+            self.cursor.execute(
+                'UPDATE customers SET externalId=?, masterExternalId=?, name=?, customerType=?, companyNumber=? '
+                'WHERE internalId=?', scalars + (customer.internalId,))
+            touched += max(self.cursor.rowcount, 0)
+
+        if new_address_id:
+            self.cursor.execute(
+                'INSERT INTO addresses VALUES (?, ?, ?, ?)',
+                (new_address_id, customer.address.street, customer.address.city, customer.address.postalCode)
+            )
+            self.cursor.execute('UPDATE customers set addressId=? WHERE internalId=?',
+                                (new_address_id, customer.internalId))
+            touched += 1 + max(self.cursor.rowcount, 0)
+
+        if stale_links:
+            self.cursor.executemany('DELETE FROM customer_shoppinglists WHERE rowid=?', stale_links)
+            touched += len(stale_links)
+        if new_links:
+            self.cursor.executemany('INSERT INTO customer_shoppinglists VALUES (?, ?)', new_links)
+            touched += len(new_links)
 
         self.conn.commit()
+        return touched
 
+    @uses_connection
     def update_shopping_list(self, shopping_list):
         pass
\ No newline at end of file
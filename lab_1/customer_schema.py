@@ -0,0 +1,199 @@
+from hashlib import blake2b
+from typing import Callable, Iterable, Iterator, List, Sequence, Tuple
+import sqlite3
+
+# Rows backfilled per round trip when a migration rewrites existing data.
+MIGRATION_BATCH_SIZE = 1000
+
+# SQLite builds before 3.32 refuse statements with more than 999 bound parameters.
+SQL_IN_CHUNK_SIZE = 500
+
+# Relations a lookup can load eagerly through its prefetch argument.
+PREFETCH_ADDRESS = "address"
+PREFETCH_SHOPPING_LISTS = "shoppingLists"
+
+# Data layer lookups join the address by default; CustomerDataAccess matching loads the row only.
+DEFAULT_PREFETCH = (PREFETCH_ADDRESS,)
+
+
+def chunked(values: Sequence, size: int = SQL_IN_CHUNK_SIZE) -> Iterator[Sequence]:
+    """Split a sequence into slices small enough for a single IN (...) clause."""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def products_hash(products: str) -> int:
+    """
+    Content hash of a joined product string, used to find duplicate shopping lists via an index.
+
+    :param products: Products joined with ", ".
+    :return: Signed 64-bit hash that fits an SQLite INTEGER.
+    """
+    return int.from_bytes(blake2b(products.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+
+def shopping_list_hash(products: Sequence[str]) -> bytes:
+    """
+    Content hash identifying a shopping list by its ordered products.
+
+    Every product is length-prefixed, so no product name can make two different lists
+    hash the same input. The 128-bit digest is treated as the list's identity.
+
+    :param products: Products of the list, in order.
+    :return: 16-byte digest stored in shoppinglists.contentHash.
+    """
+    digest = blake2b(digest_size=16)
+    for product in products:
+        data = product.encode("utf-8")
+        digest.update(len(data).to_bytes(4, "big"))
+        digest.update(data)
+    return digest.digest()
+
+
+def write_shopping_list_items(conn: sqlite3.Connection, lists: Sequence[Tuple[int, Sequence[str]]]) -> None:
+    """
+    Store the products of shopping lists in the normalized products / shoppinglist_items tables.
+
+    :param conn: Connection or cursor to write with.
+    :param lists: Pairs of (shopping list ID, ordered products) for lists without items yet.
+    """
+    names = list(dict.fromkeys(product for _, products in lists for product in products))
+    conn.executemany('INSERT OR IGNORE INTO products (name) VALUES (?)', [(name,) for name in names])
+    product_ids = {}
+    for chunk in chunked(names):
+        placeholders = ", ".join("?" * len(chunk))
+        product_ids.update(conn.execute(
+            f'SELECT name, productId FROM products WHERE name IN ({placeholders})', chunk).fetchall())
+    conn.executemany(
+        'INSERT INTO shoppinglist_items (shoppinglistId, position, productId) VALUES (?, ?, ?)',
+        [(shopping_list_id, position, product_ids[product])
+         for shopping_list_id, products in lists for position, product in enumerate(products)])
+
+
+def _create_tables(conn: sqlite3.Connection) -> None:
+    conn.execute('CREATE TABLE IF NOT EXISTS customers (internalId INT PRIMARY KEY, externalId TEXT, '
+                 'masterExternalId TEXT, name TEXT, customerType TEXT, companyNumber TEXT, addressId INT)')
+    conn.execute('CREATE TABLE IF NOT EXISTS addresses (addressId INT PRIMARY KEY, street TEXT, city TEXT, '
+                 'postalCode TEXT)')
+    conn.execute('CREATE TABLE IF NOT EXISTS shoppinglists (shoppinglistId INT PRIMARY KEY, products TEXT)')
+    conn.execute('CREATE TABLE IF NOT EXISTS customer_shoppinglists (customerId INT, shoppinglistId INT)')
+
+
+def _add_products_hash(conn: sqlite3.Connection) -> None:
+    # shoppinglists.products and productsHash are only read when older databases are migrated:
+    # since _normalize_shopping_lists, lists live in shoppinglist_items and are written with both NULL.
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(shoppinglists)')]
+    if "productsHash" not in columns:
+        conn.execute('ALTER TABLE shoppinglists ADD COLUMN productsHash INTEGER')
+    last_rowid = 0
+    while True:
+        rows = conn.execute(
+            'SELECT rowid, products FROM shoppinglists WHERE productsHash IS NULL AND rowid > ? ORDER BY rowid LIMIT ?',
+            (last_rowid, MIGRATION_BATCH_SIZE)).fetchall()
+        if not rows:
+            return
+        conn.executemany('UPDATE shoppinglists SET productsHash=? WHERE rowid=?',
+                         [(products_hash(products), rowid) for rowid, products in rows])
+        last_rowid = rows[-1][0]
+
+
+def _create_indexes(conn: sqlite3.Connection) -> None:
+    conn.execute('CREATE INDEX IF NOT EXISTS customers_externalId ON customers (externalId)')
+    conn.execute('CREATE INDEX IF NOT EXISTS customers_masterExternalId ON customers (masterExternalId)')
+    conn.execute('CREATE INDEX IF NOT EXISTS customers_companyNumber ON customers (companyNumber)')
+    conn.execute('CREATE INDEX IF NOT EXISTS customer_shoppinglists_customer '
+                 'ON customer_shoppinglists (customerId, shoppinglistId)')
+    conn.execute('CREATE INDEX IF NOT EXISTS shoppinglists_productsHash '
+                 'ON shoppinglists (productsHash, shoppinglistId)')
+
+
+def _normalize_shopping_lists(conn: sqlite3.Connection) -> None:
+    """Move the comma-joined shoppinglists.products strings into products / shoppinglist_items."""
+    conn.execute('CREATE TABLE IF NOT EXISTS products (productId INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)')
+    conn.execute('CREATE TABLE IF NOT EXISTS shoppinglist_items (shoppinglistId INT NOT NULL, position INT NOT NULL, '
+                 'productId INT NOT NULL, PRIMARY KEY (shoppinglistId, position)) WITHOUT ROWID')
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(shoppinglists)')]
+    if "contentHash" not in columns:
+        conn.execute('ALTER TABLE shoppinglists ADD COLUMN contentHash BLOB')
+    conn.execute('CREATE INDEX IF NOT EXISTS shoppinglists_contentHash ON shoppinglists (contentHash, shoppinglistId)')
+
+    last_rowid = 0
+    while True:
+        rows = conn.execute(
+            'SELECT rowid, shoppinglistId, products FROM shoppinglists '
+            'WHERE contentHash IS NULL AND rowid > ? ORDER BY rowid LIMIT ?',
+            (last_rowid, MIGRATION_BATCH_SIZE)).fetchall()
+        if not rows:
+            return
+        lists = [(shopping_list_id, products.split(", ") if products is not None else [])
+                 for _, shopping_list_id, products in rows]
+        write_shopping_list_items(conn, lists)
+        conn.executemany('UPDATE shoppinglists SET contentHash=? WHERE rowid=?',
+                         [(shopping_list_hash(products), rowid) for (rowid, _, _), (_, products) in zip(rows, lists)])
+        last_rowid = rows[-1][0]
+
+
+def _drop_products_hash_index(conn: sqlite3.Connection) -> None:
+    """Drop the productsHash index, which lookups stopped using and new rows leave NULL since normalization."""
+    conn.execute('DROP INDEX IF EXISTS shoppinglists_productsHash')
+
+
+# Applied in order; PRAGMA user_version records how many have run on a database.
+# Every step must also be safe on a database that already has its effect, and must use execute
+# rather than executescript, which would commit the migration transaction partway.
+MIGRATIONS: List[Callable[[sqlite3.Connection], None]] = [
+    _create_tables,
+    _add_products_hash,
+    _create_indexes,
+    _normalize_shopping_lists,
+    _drop_products_hash_index,
+]
+
+
+def ensure_schema(conn: sqlite3.Connection) -> int:
+    """
+    Create the customer store tables and indexes, applying the migrations a database is missing.
+
+    The migrations run in one BEGIN IMMEDIATE transaction, and the version is read again once
+    the write lock is held, so connections opening a new database at the same time migrate it
+    only once. A transaction the caller left open is committed first.
+
+    :param conn: Connection to the customer database.
+    :return: Schema version of the database after migrating.
+    """
+    version = conn.execute('PRAGMA user_version').fetchone()[0]
+    if version >= len(MIGRATIONS):
+        return version
+    conn.commit()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        if version >= len(MIGRATIONS):
+            conn.rollback()
+            return version
+        for migration in MIGRATIONS[version:]:
+            migration(conn)
+        conn.execute(f'PRAGMA user_version = {len(MIGRATIONS)}')
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return len(MIGRATIONS)
+
+
+def scanning_statements(conn: sqlite3.Connection, statements: Iterable[str]) -> List[Tuple[str, str]]:
+    """
+    Run EXPLAIN QUERY PLAN for statements and report the ones that fall back to a full table scan.
+
+    :param conn: Connection to a database with the customer schema.
+    :param statements: SQL statements with literal parameter values, e.g. from a trace callback.
+    :return: Pairs of (statement, plan detail) for every SCAN step found.
+    """
+    found = []
+    for sql in dict.fromkeys(statements):
+        if not sql.lstrip().upper().startswith(("SELECT", "INSERT", "UPDATE", "DELETE")):
+            continue
+        for row in conn.execute('EXPLAIN QUERY PLAN ' + sql):
+            if row[3].startswith("SCAN"):
+                found.append((sql, row[3]))
+    return found
@@ -1,3 +1,7 @@
+from functools import lru_cache
+from typing import Tuple, Type, Union
+
+
 class TennisGameDefactored1:
     """
     A class representing a tennis game, tracking players' scores and providing the current score.
@@ -215,3 +219,163 @@ class TennisGameDefactored3:
             return f"Advantage {self.p1_name if self.p1 > self.p2 else self.p2_name}"
 
         return f"Win for {self.p1_name if self.p1 > self.p2 else self.p2_name}"
+
+
+# Score table slots: 16 for both players below four points, then one per clamped lead.
+_EXTENDED_OFFSET = 18
+
+# Attributes holding the points of each reference implementation.
+_POINT_ATTRIBUTES = {
+    TennisGameDefactored1: ("p1_points", "p2_points"),
+    TennisGameDefactored2: ("p1_points", "p2_points"),
+    TennisGameDefactored3: ("p1", "p2"),
+}
+
+# Stand-in player names the score templates are built with; no real name contains NUL characters.
+_TEMPLATE_NAMES = ("\x00player1\x00", "\x00player2\x00")
+
+
+def score_index(p1_points: int, p2_points: int) -> int:
+    """
+    Maps a game state to its slot in a score table.
+
+    While both players are below four points every state has its own slot. Beyond that
+    the score depends only on the lead, which is clamped to -2..2.
+
+    Args:
+        p1_points (int): Points won by the first player.
+        p2_points (int): Points won by the second player.
+
+    Returns:
+        int: Index into a table built by score_table.
+    """
+    if p1_points < 4 and p2_points < 4:
+        return p1_points * 4 + p2_points
+    lead = p1_points - p2_points
+    return _EXTENDED_OFFSET + (2 if lead > 2 else -2 if lead < -2 else lead)
+
+
+@lru_cache(maxsize=None)
+def score_template(rules: Type = TennisGameDefactored3) -> Tuple[Union[str, Tuple[str, int]], ...]:
+    """
+    Builds the score strings of a scoring implementation independently of the player names.
+
+    The table is produced by the reference implementation itself, once per class, so a
+    lookup returns exactly what its score() would. Only "Advantage ..." and "Win for ..."
+    name a player; those slots hold the text before the name and the number of the player.
+
+    Args:
+        rules (Type): One of the TennisGameDefactored classes whose output is reproduced.
+
+    Returns:
+        Tuple[Union[str, Tuple[str, int]], ...]: Score strings, or (prefix, player number)
+            pairs for the slots naming a player, indexed by score_index.
+    """
+    p1_attribute, p2_attribute = _POINT_ATTRIBUTES[rules]
+    states = [(p1, p2) for p1 in range(4) for p2 in range(4)]
+    states += [(4 + max(lead, 0), 4 - min(lead, 0)) for lead in range(-2, 3)]
+    table = [""] * (_EXTENDED_OFFSET + 3)
+    for p1_points, p2_points in states:
+        game = rules(*_TEMPLATE_NAMES)
+        setattr(game, p1_attribute, p1_points)
+        setattr(game, p2_attribute, p2_points)
+        score = game.score()
+        for player, name in enumerate(_TEMPLATE_NAMES, 1):
+            if score.endswith(name):
+                score = (score[:-len(name)], player)
+                break
+        table[score_index(p1_points, p2_points)] = score
+    return tuple(table)
+
+
+def score_table(player1_name: str, player2_name: str,
+                rules: Type = TennisGameDefactored3) -> Tuple[str, ...]:
+    """
+    Builds every score string a game between two players can show.
+
+    Args:
+        player1_name (str): Name of the first player.
+        player2_name (str): Name of the second player.
+        rules (Type): One of the TennisGameDefactored classes whose output is reproduced.
+
+    Returns:
+        Tuple[str, ...]: Score strings indexed by score_index.
+    """
+    names = (player1_name, player2_name)
+    return tuple(entry if isinstance(entry, str) else entry[0] + names[entry[1] - 1]
+                 for entry in score_template(rules))
+
+
+class TennisGame:
+    """
+    A tennis game scored through a shared precomputed table of score strings.
+
+    Reproduces the output of one of the TennisGameDefactored classes. The table is shared
+    by all games of the same rules whatever the player names, so creating a game costs
+    nothing extra; only the "Advantage ..." and "Win for ..." scores join the name in.
+    """
+
+    __slots__ = ("player1_name", "player2_name", "p1_points", "p2_points", "_table")
+
+    def __init__(self, player1_name: str, player2_name: str, rules: Type = TennisGameDefactored3) -> None:
+        """
+        Initializes the game with player names and sets initial scores to zero.
+
+        Args:
+            player1_name (str): Name of the first player.
+            player2_name (str): Name of the second player.
+            rules (Type): TennisGameDefactored class whose score strings are reproduced.
+        """
+        self.player1_name = player1_name
+        self.player2_name = player2_name
+        self.p1_points = 0
+        self.p2_points = 0
+        self._table = score_template(rules)
+
+    def won_point(self, player_name: str) -> None:
+        """
+        Increases the score of the player who won the point.
+
+        Args:
+            player_name (str): Name of the player who won the point.
+        """
+        if player_name == self.player1_name:
+            self.p1_points += 1
+        else:
+            self.p2_points += 1
+
+    def score(self) -> str:
+        """
+        Returns the current score of the game using tennis terminology.
+
+        Returns:
+            str: The current score, as the rules implementation would format it.
+        """
+        # score_index inlined, as this runs after every point.
+        p1_points = self.p1_points
+        p2_points = self.p2_points
+        if p1_points < 4 and p2_points < 4:
+            return self._table[p1_points * 4 + p2_points]
+        lead = p1_points - p2_points
+        entry = self._table[_EXTENDED_OFFSET + (2 if lead > 2 else -2 if lead < -2 else lead)]
+        if entry.__class__ is str:
+            return entry
+        return entry[0] + (self.player1_name if entry[1] == 1 else self.player2_name)
+
+    def set_p1_score(self, number: int) -> None:
+        """
+        Adds points to player 1's score.
+
+        Args:
+            number (int): The number of points to add to player 1's score.
+        """
+        self.p1_points += number
+
+    def set_p2_score(self, number: int) -> None:
+        """
+        Adds points to player 2's score.
+
+        Args:
+            number (int): The number of points to add to player 2's score.
+        """
+        self.p2_points += number
@@ -0,0 +1,294 @@
+from collections import deque
+from functools import wraps
+from typing import Any, Deque, Dict, List, Optional
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+
+from customer_cache import CachedCustomerDataLayer
+
+# Latency samples kept per method or statement for the percentiles.
+MAX_SAMPLES = 10000
+
+# Collapses the placeholder lists of chunked IN (...) queries, a single ? included, into one statement key.
+_PLACEHOLDER_LIST = re.compile(r"\bIN \(\?(?:, \?)*\)", re.IGNORECASE)
+
+
+def statement_key(sql: str) -> str:
+    """Normalize a SQL statement so that IN (...) lookups of any chunk size share one key."""
+    return _PLACEHOLDER_LIST.sub("IN (?, ...)", sql)
+
+
+class TimingStats:
+    """Call count, cumulative latency, rows and a bounded window of latency samples."""
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.rows = 0
+        self.samples: Deque[float] = deque(maxlen=MAX_SAMPLES)
+
+    def add(self, seconds: float, rows: int = 0) -> None:
+        self.calls += 1
+        self.seconds += seconds
+        self.rows += rows
+        self.samples.append(seconds)
+
+    def as_dict(self) -> Dict[str, Any]:
+        ordered = sorted(self.samples)
+
+        def percentile(fraction: float) -> float:
+            return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+        return {"calls": self.calls, "total_seconds": self.seconds, "rows": self.rows,
+                "p50_seconds": percentile(0.50), "p99_seconds": percentile(0.99)}
+
+
+class InstrumentationSink:
+    """Receives reports and slow statements from a QueryInstrumentation."""
+
+    def emit(self, report: Dict[str, Any]) -> None:
+        """Handle a report built by QueryInstrumentation.report."""
+
+    def slow_statement(self, sql: str, params: Any, seconds: float) -> None:
+        """Handle a statement that took at least the slow-query threshold."""
+
+
+class InMemorySink(InstrumentationSink):
+    """Keeps every report and slow statement in lists, for tests and interactive use."""
+
+    def __init__(self):
+        self.reports: List[Dict[str, Any]] = []
+        self.slow: List[Dict[str, Any]] = []
+
+    def emit(self, report: Dict[str, Any]) -> None:
+        self.reports.append(report)
+
+    def slow_statement(self, sql: str, params: Any, seconds: float) -> None:
+        self.slow.append({"sql": sql, "params": params, "seconds": seconds})
+
+
+class LoggingSink(InstrumentationSink):
+    """Writes reports at INFO and slow statements at WARNING to a logger."""
+
+    def __init__(self, logger: logging.Logger = None):
+        self.logger = logger or logging.getLogger(__name__)
+
+    def emit(self, report: Dict[str, Any]) -> None:
+        for section in ("methods", "statements"):
+            for name, stats in report[section].items():
+                self.logger.info("%s %s: %d calls, %.6f s total, p50 %.6f s, p99 %.6f s, %d rows", section[:-1],
+                                 name, stats["calls"], stats["total_seconds"], stats["p50_seconds"],
+                                 stats["p99_seconds"], stats["rows"])
+
+    def slow_statement(self, sql: str, params: Any, seconds: float) -> None:
+        self.logger.warning("slow statement (%.6f s): %s %r", seconds, sql, params)
+
+
+class JsonSink(InstrumentationSink):
+    """Dumps every report, slow statements included, to a JSON file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.slow: List[Dict[str, Any]] = []
+
+    def emit(self, report: Dict[str, Any]) -> None:
+        with open(self.path, "w", encoding="utf-8") as file:
+            json.dump(dict(report, slow_statements=self.slow), file, indent=2, default=repr)
+
+    def slow_statement(self, sql: str, params: Any, seconds: float) -> None:
+        self.slow.append({"sql": sql, "params": params, "seconds": seconds})
+
+
+class InstrumentedCursor:
+    """
+    Cursor proxy timing every statement from execute until its rows are fetched.
+
+    Statements without a result set are recorded right after execute, queries when
+    they are fetched or when the next statement starts.
+    """
+
+    def __init__(self, cursor: sqlite3.Cursor, instrumentation: "QueryInstrumentation"):
+        self.wrapped = cursor
+        self.instrumentation = instrumentation
+        self._pending = None
+
+    def __getattr__(self, name):
+        return getattr(self.wrapped, name)
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def execute(self, sql: str, params: Any = ()) -> "InstrumentedCursor":
+        return self._run(self.wrapped.execute, sql, params)
+
+    def executemany(self, sql: str, params: Any) -> "InstrumentedCursor":
+        return self._run(self.wrapped.executemany, sql, params)
+
+    def fetchone(self):
+        return self._fetch(self.wrapped.fetchone, single=True)
+
+    def fetchmany(self, size: int = None):
+        return self._fetch(self.wrapped.fetchmany, size or self.wrapped.arraysize)
+
+    def fetchall(self):
+        return self._fetch(self.wrapped.fetchall)
+
+    def _run(self, method, sql: str, params: Any) -> "InstrumentedCursor":
+        self._flush()
+        started = time.perf_counter()
+        method(sql, params)
+        elapsed = time.perf_counter() - started
+        if self.wrapped.description is None:
+            self.instrumentation.record_statement(sql, params, elapsed, max(self.wrapped.rowcount, 0))
+        else:
+            self._pending = [sql, params, elapsed, 0]
+        return self
+
+    def _fetch(self, method, *args, single: bool = False):
+        started = time.perf_counter()
+        result = method(*args)
+        if self._pending is not None:
+            self._pending[2] += time.perf_counter() - started
+            self._pending[3] += (result is not None) if single else len(result)
+            self._flush()
+        return result
+
+    def _flush(self) -> None:
+        if self._pending is not None:
+            sql, params, elapsed, rows = self._pending
+            self._pending = None
+            self.instrumentation.record_statement(sql, params, elapsed, rows)
+
+
+class InstrumentedConnection:
+    """
+    Connection proxy running execute through an InstrumentedCursor.
+
+    Used for the connection of an ID allocator, which issues its statements with conn.execute.
+    """
+
+    def __init__(self, conn: sqlite3.Connection, instrumentation: "QueryInstrumentation"):
+        self.wrapped = conn
+        self.instrumentation = instrumentation
+
+    def __getattr__(self, name):
+        return getattr(self.wrapped, name)
+
+    def execute(self, sql: str, params: Any = ()) -> InstrumentedCursor:
+        return InstrumentedCursor(self.wrapped.cursor(), self.instrumentation).execute(sql, params)
+
+    def executemany(self, sql: str, params: Any) -> InstrumentedCursor:
+        return InstrumentedCursor(self.wrapped.cursor(), self.instrumentation).executemany(sql, params)
+
+
+class QueryInstrumentation:
+    """
+    Opt-in per-method and per-statement profiling of a CustomerDataLayer.
+
+    attach replaces the layer's public methods and cursors on that instance only, so a
+    layer that was never attached, or has been detached, runs without any overhead.
+    """
+
+    def __init__(self, sink: InstrumentationSink = None, slow_threshold: Optional[float] = None):
+        """
+        :param sink: Receiver of reports and slow statements; an InMemorySink by default.
+        :param slow_threshold: Seconds from which a statement is passed to the sink with its parameters.
+        """
+        self.sink = sink or InMemorySink()
+        self.slow_threshold = slow_threshold
+        self.methods: Dict[str, TimingStats] = {}
+        self.statements: Dict[str, TimingStats] = {}
+        self._lock = threading.Lock()
+        # Rows fetched so far by the current thread, so methods can report theirs.
+        self._local = threading.local()
+
+    def attach(self, data_layer) -> None:
+        """
+        Start recording the calls and statements of a CustomerDataLayer instance.
+
+        A CachedCustomerDataLayer, as exposed by CustomerDataAccess(cache=...), is unwrapped, so
+        the lookups that miss the cache are recorded. The connection of the layer's ID allocator
+        is wrapped too, so the reservations of create and update are among the statements.
+        """
+        data_layer = self._data_layer(data_layer)
+        allocator = data_layer.id_allocator
+        if isinstance(getattr(allocator, "conn", None), sqlite3.Connection):
+            allocator.conn = InstrumentedConnection(allocator.conn, self)
+        for name in dir(type(data_layer)):
+            attribute = getattr(type(data_layer), name)
+            if not name.startswith("_") and callable(attribute) and name != "open_cursor":
+                setattr(data_layer, name, self._timed(name, getattr(data_layer, name)))
+
+        open_cursor = data_layer.open_cursor
+        data_layer.open_cursor = lambda conn: InstrumentedCursor(open_cursor(conn), self)
+        if data_layer.pool is None:
+            data_layer._cursor = InstrumentedCursor(data_layer._cursor, self)
+
+    def detach(self, data_layer) -> None:
+        """Stop recording a CustomerDataLayer instance and restore its original methods."""
+        data_layer = self._data_layer(data_layer)
+        allocator = data_layer.id_allocator
+        if isinstance(getattr(allocator, "conn", None), InstrumentedConnection):
+            allocator.conn = allocator.conn.wrapped
+        for name, value in list(vars(data_layer).items()):
+            if callable(value) and hasattr(type(data_layer), name):
+                delattr(data_layer, name)
+        if isinstance(data_layer.__dict__.get("_cursor"), InstrumentedCursor):
+            data_layer._cursor._flush()
+            data_layer._cursor = data_layer._cursor.wrapped
+
+    def record_statement(self, sql: str, params: Any, seconds: float, rows: int) -> None:
+        """Account one executed statement and report it if it is slow."""
+        self._local.rows = getattr(self._local, "rows", 0) + rows
+        with self._lock:
+            self.statements.setdefault(statement_key(sql), TimingStats()).add(seconds, rows)
+        if self.slow_threshold is not None and seconds >= self.slow_threshold:
+            self.sink.slow_statement(sql, params, seconds)
+
+    def report(self) -> Dict[str, Any]:
+        """Build a snapshot of the statistics, slowest first by cumulative time."""
+        with self._lock:
+            def section(stats: Dict[str, TimingStats]) -> Dict[str, Dict[str, Any]]:
+                ordered = sorted(stats.items(), key=lambda item: item[1].seconds, reverse=True)
+                return {name: value.as_dict() for name, value in ordered}
+
+            return {"methods": section(self.methods), "statements": section(self.statements)}
+
+    def flush(self) -> Dict[str, Any]:
+        """Send the current report to the sink and return it."""
+        report = self.report()
+        self.sink.emit(report)
+        return report
+
+    def reset(self) -> None:
+        """Forget everything recorded so far."""
+        with self._lock:
+            self.methods.clear()
+            self.statements.clear()
+
+    @staticmethod
+    def _data_layer(data_layer):
+        """The CustomerDataLayer behind data_layer; raises TypeError for anything else."""
+        if isinstance(data_layer, CachedCustomerDataLayer):
+            data_layer = data_layer.data_layer
+        if not hasattr(type(data_layer), "open_cursor"):
+            raise TypeError(f"cannot instrument {type(data_layer).__name__}, expected a CustomerDataLayer")
+        return data_layer
+
+    def _timed(self, name: str, method):
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            rows_before = getattr(self._local, "rows", 0)
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                rows = getattr(self._local, "rows", 0) - rows_before
+                with self._lock:
+                    self.methods.setdefault(name, TimingStats()).add(elapsed, rows)
+        return wrapper
@@ -0,0 +1,99 @@
+from typing import Callable, Dict, Hashable, Iterable, Iterator, NamedTuple, Optional, Tuple, Type
+
+from lab1 import TennisGame, TennisGameDefactored3
+
+
+class ScoreChange(NamedTuple):
+    """The displayed score of a match after a point that changed it."""
+
+    match_id: Hashable
+    score: str
+    finished: bool
+
+
+class MatchReplay:
+    """
+    Replays point events of many interleaved matches, keeping only the live ones.
+
+    Every live match is a single TennisGame sharing its score table with all the other
+    matches, whoever plays them, and it is forgotten as soon as it is decided, so memory
+    is bounded by the number of matches in progress rather than by the length of the log
+    or the number of distinct players. An event for a match id that has already finished starts a new game.
+    """
+
+    def __init__(self, players: Optional[Callable[[Hashable], Tuple[str, str]]] = None,
+                 rules: Type = TennisGameDefactored3) -> None:
+        """
+        Initializes a replay without live matches.
+
+        Args:
+            players (Optional[Callable]): Returns the (player 1, player 2) names of a match id, e.g. the
+                get method of a dict. Without it, or when it returns None, player 1 is whoever wins the
+                first point of the match and player 2 the next other name seen.
+            rules (Type): TennisGameDefactored class whose score strings are displayed.
+        """
+        self.players = players
+        self.rules = rules
+        self.live: Dict[Hashable, TennisGame] = {}
+
+    def won_point(self, match_id: Hashable, player_name: str) -> Optional[ScoreChange]:
+        """
+        Applies one point event.
+
+        Args:
+            match_id (Hashable): Identifier of the match the point belongs to.
+            player_name (str): Name of the player who won the point.
+
+        Returns:
+            Optional[ScoreChange]: The new score, or None if the displayed score did not change.
+        """
+        game = self.live.get(match_id)
+        if game is None:
+            names = self.players(match_id) if self.players is not None else None
+            player1_name, player2_name = names or (player_name, None)
+            game = self.live[match_id] = TennisGame(player1_name, player2_name, self.rules)
+        elif game.player2_name is None and player_name != game.player1_name:
+            # Player 2 has won no point yet, so no score shown so far named them.
+            game.player2_name = player_name
+
+        previous = game.score()
+        game.won_point(player_name)
+        score = game.score()
+        finished = max(game.p1_points, game.p2_points) >= 4 and abs(game.p1_points - game.p2_points) >= 2
+        if finished:
+            del self.live[match_id]
+        if score != previous or finished:
+            return ScoreChange(match_id, score, finished)
+        return None
+
+    def replay(self, events: Iterable[Tuple[Hashable, str]]) -> Iterator[ScoreChange]:
+        """
+        Consumes (match_id, player_name) events lazily, yielding every change of a displayed score.
+
+        Args:
+            events (Iterable[Tuple[Hashable, str]]): Point events in the order they were played.
+
+        Yields:
+            ScoreChange: The score of a match after each point that changed it.
+        """
+        for match_id, player_name in events:
+            change = self.won_point(match_id, player_name)
+            if change is not None:
+                yield change
+
+
+def replay_points(events: Iterable[Tuple[Hashable, str]],
+                  players: Optional[Callable[[Hashable], Tuple[str, str]]] = None,
+                  rules: Type = TennisGameDefactored3) -> Iterator[ScoreChange]:
+    """
+    Streams the score changes of an event log, see MatchReplay.
+
+    Args:
+        events (Iterable[Tuple[Hashable, str]]): (match_id, player_name) point events.
+        players (Optional[Callable]): Returns the (player 1, player 2) names of a match id.
+        rules (Type): TennisGameDefactored class whose score strings are displayed.
+
+    Yields:
+        ScoreChange: The score of a match after each point that changed it.
+    """
+    yield from MatchReplay(players, rules).replay(events)
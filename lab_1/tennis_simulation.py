@@ -0,0 +1,147 @@
+from typing import List, Optional, Union
+
+import numpy as np
+
+from lab1 import TennisGameDefactored3, score_index, score_table
+
+# Points drawn per simulated game; a game still level after this many is reported unfinished.
+DEFAULT_MAX_POINTS = 64
+
+# Points scored per step before decided games are dropped; most games end within eight points.
+POINT_WINDOW = 8
+
+# Games processed per block, bounding the temporary (games x points) arrays.
+DEFAULT_CHUNK_SIZE = 16384
+
+
+class SimulationResult:
+    """
+    Outcome of a batch of tennis games, one array element per game.
+
+    Attributes:
+        p1_points (np.ndarray): Points of player 1 when the game ended, or after the last point played.
+        p2_points (np.ndarray): Points of player 2 at the same moment.
+        winner (np.ndarray): 1 or 2 for the winning player, 0 for a game that did not finish.
+        points_to_finish (np.ndarray): Number of points the game lasted, or -1 if it did not finish.
+    """
+
+    def __init__(self, p1_points: np.ndarray, p2_points: np.ndarray, winner: np.ndarray,
+                 points_to_finish: np.ndarray) -> None:
+        self.p1_points = p1_points
+        self.p2_points = p2_points
+        self.winner = winner
+        self.points_to_finish = points_to_finish
+
+    def __len__(self) -> int:
+        return len(self.winner)
+
+    def scores(self, player1_name: str = "player1", player2_name: str = "player2") -> np.ndarray:
+        """
+        Returns the final score of every game as TennisGameDefactored3.score() shows it.
+
+        Args:
+            player1_name (str): Name of the first player.
+            player2_name (str): Name of the second player.
+
+        Returns:
+            np.ndarray: Object array of score strings.
+        """
+        table = np.array(score_table(player1_name, player2_name, TennisGameDefactored3), dtype=object)
+        lead = np.clip(self.p1_points - self.p2_points, -2, 2)
+        index = np.where((self.p1_points < 4) & (self.p2_points < 4),
+                         self.p1_points * 4 + self.p2_points, score_index(4, 4) + lead)
+        return table[index]
+
+    @classmethod
+    def concatenate(cls, results: List["SimulationResult"]) -> "SimulationResult":
+        """Joins the results of consecutive blocks of games."""
+        return cls(*(np.concatenate([getattr(result, name) for result in results])
+                     for name in ("p1_points", "p2_points", "winner", "points_to_finish")))
+
+
+def _play_block(p1_won: np.ndarray) -> SimulationResult:
+    """
+    Scores one block of games given as a boolean (games x points) array.
+
+    Points are taken a window of columns at a time, and games leave the working set
+    as soon as they are decided, so most of the points after a win are never read.
+    """
+    games, points = p1_won.shape
+    p1_final = np.zeros(games, dtype=np.int32)
+    p2_final = np.zeros(games, dtype=np.int32)
+    winner = np.zeros(games, dtype=np.int8)
+    points_to_finish = np.full(games, -1)
+
+    active = np.arange(games)
+    for start in range(0, points, POINT_WINDOW):
+        window = p1_won[active, start:start + POINT_WINDOW]
+        p1_points = np.cumsum(window, axis=1, dtype=np.int32) + p1_final[active, None]
+        p2_points = np.arange(start + 1, start + window.shape[1] + 1, dtype=np.int32) - p1_points
+        won = (np.maximum(p1_points, p2_points) >= 4) & (np.abs(p1_points - p2_points) >= 2)
+        finished = won.any(axis=1)
+        end = np.where(finished, won.argmax(axis=1), window.shape[1] - 1)
+
+        rows = np.arange(len(active))
+        p1_final[active] = p1_points[rows, end]
+        p2_final[active] = p2_points[rows, end]
+        decided = active[finished]
+        winner[decided] = np.where(p1_final[decided] > p2_final[decided], 1, 2)
+        points_to_finish[decided] = start + end[finished] + 1
+        active = active[~finished]
+        if not len(active):
+            break
+    return SimulationResult(p1_final, p2_final, winner, points_to_finish)
+
+
+def play_points(point_winners: np.ndarray, chunk_size: int = DEFAULT_CHUNK_SIZE) -> SimulationResult:
+    """
+    Scores many games at once from the winners of their points.
+
+    Points after the one that decides a game are ignored, as TennisGameDefactored3
+    would show "Win for" from then on anyway.
+
+    Args:
+        point_winners (np.ndarray): 2-D array (games x points); a true or non-zero entry is a point won by
+            player 1, anything else a point won by player 2.
+        chunk_size (int): Games scored per block.
+
+    Returns:
+        SimulationResult: Final points, winner and length of every game.
+    """
+    point_winners = np.asarray(point_winners)
+    if point_winners.ndim != 2:
+        raise ValueError(f"point_winners must be a 2-D array, got {point_winners.ndim} dimension(s)")
+    return SimulationResult.concatenate([
+        _play_block(point_winners[start:start + chunk_size] != 0)
+        for start in range(0, max(len(point_winners), 1), chunk_size)])
+
+
+def simulate_games(p1_win_probability: Union[float, np.ndarray], games: Optional[int] = None,
+                   max_points: int = DEFAULT_MAX_POINTS, seed: Optional[int] = None,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE) -> SimulationResult:
+    """
+    Monte Carlo simulation of games where player 1 wins each point with a fixed probability.
+
+    Args:
+        p1_win_probability (Union[float, np.ndarray]): Probability for all games, or one per game.
+        games (Optional[int]): Number of games; required with a scalar probability.
+        max_points (int): Points drawn per game.
+        seed (Optional[int]): Seed of the random generator, for reproducible runs.
+        chunk_size (int): Games drawn and scored per block.
+
+    Returns:
+        SimulationResult: Final points, winner and length of every game.
+    """
+    probability = np.asarray(p1_win_probability, dtype=np.float64)
+    if probability.ndim == 0:
+        if games is None:
+            raise ValueError("games is required when p1_win_probability is a scalar")
+        probability = np.full(games, probability)
+    elif probability.ndim != 1 or (games is not None and games != len(probability)):
+        raise ValueError("p1_win_probability must be a scalar or have one entry per game")
+
+    generator = np.random.default_rng(seed)
+    return SimulationResult.concatenate([
+        _play_block(generator.random((len(block), max_points)) < block[:, None])
+        for block in (probability[start:start + chunk_size]
+                      for start in range(0, max(len(probability), 1), chunk_size))])
@@ -1,6 +1,10 @@
 import json
 import hashlib
-from typing import List
+import heapq
+import os
+from array import array
+from itertools import chain, islice
+from typing import Iterable, Iterator, List, Optional
 
 """
 В этом модуле обитают функции, необходимые для автоматизированной проверки результатов ваших трудов.
@@ -22,11 +26,137 @@ def calculate_checksum(row_numbers: List[int]) -> str:
     :param row_numbers: список целочисленных номеров строк csv-файла, на которых были найдены ошибки валидации
     :return: md5 хеш для проверки через github action
     """
-    row_numbers.sort()
-    return hashlib.md5(json.dumps(row_numbers).encode('utf-8')).hexdigest()
+    return hashlib.md5(json.dumps(sorted(row_numbers)).encode('utf-8')).hexdigest()
 
 
-def serialize_result(variant: int, checksum: str) -> None:
+# Сколько добавленных по одному номеров копится, прежде чем они сортируются в отдельный отрезок.
+CHECKSUM_RUN_SIZE = 1 << 16
+
+# Сколько номеров кодируется в json за один вызов md5.update.
+CHECKSUM_BATCH_SIZE = 4096
+
+# Коды целочисленных типов array, данные которых можно скопировать из чужого буфера как есть.
+_INTEGER_TYPECODES = "bBhHiIlLqQ"
+
+
+def _compact_rows(rows: Iterable[int]) -> array:
+    """
+    Копирует номера строк в array, не создавая объект int на каждый номер, если у rows есть целочисленный буфер.
+
+    :param rows: array, numpy-массив или любая последовательность целых
+    :return: одномерный array с теми же номерами
+    """
+    try:
+        view = memoryview(rows)
+    except TypeError:
+        return array("q", rows)
+    typecode = view.format.lstrip("@=")
+    if view.ndim != 1 or typecode not in _INTEGER_TYPECODES or not view.c_contiguous:
+        return array("q", rows)
+    run = array(typecode)
+    run.frombytes(view.cast("B"))
+    return run
+
+
+def _batches(rows: Iterable[int], size: int) -> Iterator[List[int]]:
+    iterator = iter(rows)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+class ChecksumBuilder:
+    """
+    Считает ту же контрольную сумму, что и calculate_checksum, не требуя списка всех номеров строк.
+
+    Номера можно добавлять в любом порядке по одному или отсортированными кусками (например, от
+    параллельных процессов). Они хранятся компактными отсортированными отрезками по 8 байт на номер,
+    а hexdigest сливает отрезки и скармливает md5 json-представление списка по частям.
+    """
+
+    def __init__(self):
+        self._runs: List[array] = []
+        self._pending = array("q")
+        self._pending_sorted = True
+
+    def __len__(self) -> int:
+        return sum(len(run) for run in self._runs) + len(self._pending)
+
+    def add(self, row: int) -> None:
+        """
+        Добавляет номер невалидной строки.
+
+        :param row: номер строки, считая с 0 от первой строки данных
+        """
+        pending = self._pending
+        if pending and row < pending[-1]:
+            self._pending_sorted = False
+        pending.append(row)
+        if len(pending) >= CHECKSUM_RUN_SIZE:
+            self._seal()
+
+    def add_rows(self, rows: Iterable[int], is_sorted: bool = False) -> None:
+        """
+        Добавляет много номеров строк разом; переданный объект не изменяется.
+
+        Неотсортированные номера, кроме numpy-массива, сортируются отрезками по CHECKSUM_RUN_SIZE, так что
+        список Python создается только для одного отрезка за раз; с is_sorted=True копия не сортируется вовсе.
+
+        :param rows: список, array (в том числе array('i')) или numpy-массив номеров строк
+        :param is_sorted: номера уже отсортированы по возрастанию, например пришли от процесса пула
+        """
+        if not is_sorted and hasattr(rows, "argsort"):
+            # numpy-массив сортируется своим методом в копии, без списка Python.
+            rows = rows.copy()
+            rows.sort()
+            is_sorted = True
+        run = _compact_rows(rows)
+        if is_sorted:
+            if run:
+                self._runs.append(run)
+            return
+        # Неотсортированный буфер сортируется отрезками по CHECKSUM_RUN_SIZE: временный список Python
+        # не больше одного отрезка, а hexdigest сольет их, как отрезки от add.
+        for start in range(0, len(run), CHECKSUM_RUN_SIZE):
+            self._runs.append(array(run.typecode, sorted(run[start:start + CHECKSUM_RUN_SIZE])))
+
+    def hexdigest(self) -> str:
+        """
+        Вычисляет md5 хеш, побайтно совпадающий с calculate_checksum от всех добавленных номеров.
+
+        После вызова можно продолжать добавлять номера.
+
+        :return: md5 хеш для проверки через github action
+        """
+        self._seal()
+        runs = self._runs
+        if all(left[-1] <= right[0] for left, right in zip(runs, runs[1:])):
+            rows = chain.from_iterable(runs)
+        else:
+            rows = heapq.merge(*runs)
+        digest = hashlib.md5(b"[")
+        separator = ""
+        for batch in _batches(rows, CHECKSUM_BATCH_SIZE):
+            digest.update((separator + ", ".join(map(str, batch))).encode("utf-8"))
+            separator = ", "
+        digest.update(b"]")
+        return digest.hexdigest()
+
+    def _seal(self) -> None:
+        """Превращает накопленные по одному номера в отсортированный отрезок."""
+        if self._pending:
+            pending = self._pending
+            self._runs.append(pending if self._pending_sorted else array("q", sorted(pending)))
+            self._pending = array("q")
+            self._pending_sorted = True
+
+
+# Файл с результатом, который проверяет github action.
+RESULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "result.json")
+
+
+def serialize_result(variant: int, checksum: str, path: Optional[str] = None) -> None:
     """
     Метод для сериализации результатов лабораторной пишите сами.
     Вам нужно заполнить данными - номером варианта и контрольной суммой - файл, лежащий в папке с лабораторной.
@@ -37,8 +167,10 @@ def serialize_result(variant: int, checksum: str) -> None:
 
     :param variant: номер вашего варианта
     :param checksum: контрольная сумма, вычисленная через calculate_checksum()
+    :param path: куда записать результат; по умолчанию result.json рядом с этим модулем
     """
-    pass
+    with open(path or RESULT_PATH, "w", encoding="utf-8") as file:
+        json.dump({"variant": str(variant), "checksum": checksum}, file, indent=2, ensure_ascii=False)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,170 @@
+"""
+Потоковая валидация csv-файлов лабораторной через отображение файла в память (mmap).
+"""
+import argparse
+import csv
+import mmap
+import re
+from functools import lru_cache
+from typing import Iterator, Optional, Pattern, Tuple
+
+from checksum import ChecksumBuilder
+from validation import DELIMITER, FIELD_PATTERNS, compile_patterns, read_header
+
+# Сколько байтов обработанной части файла держать в памяти, прежде чем вернуть страницы системе.
+RELEASE_WINDOW = 4 << 20
+
+_ASCII_MARKERS = f'\n\r"{DELIMITER}'
+
+
+@lru_cache(maxsize=None)
+def compile_row_pattern(header: Tuple[str, ...]) -> Tuple[Pattern, Tuple[Tuple[int, Pattern], ...]]:
+    """
+    Собирает выражение над байтами для целой строки вида "...";"...", чтобы проверять ее одним вызовом.
+
+    Выражения из одних ASCII-символов встраиваются в него как есть. Ячейки полей, которым нужен
+    декодированный текст (профессия на кириллице, группа крови с минусом U+2212), захватываются группой
+    и проверяются отдельно после декодирования.
+
+    :param header: названия столбцов из первой строки csv-файла
+    :return: выражение для строки и пары (номер группы, выражение над str) для декодируемых ячеек
+    """
+    compiled = compile_patterns(header)
+    cells = []
+    text_cells = []
+    for name, pattern in zip(header, compiled):
+        if FIELD_PATTERNS[name].isascii():
+            cells.append(f"(?:{FIELD_PATTERNS[name]})")
+        else:
+            cells.append('([^"]*)')
+            text_cells.append((len(text_cells) + 1, pattern))
+    row = '"' + f'"{DELIMITER}"'.join(cells) + '"'
+    return re.compile(row.encode("ascii"), re.ASCII), tuple(text_cells)
+
+
+class MappedCsvValidator:
+    """
+    Проверяет csv-файл, отображенный в память, строка за строкой.
+
+    Границы строк ищутся в байтах, выражения применяются прямо к участкам отображения,
+    а пройденные страницы возвращаются системе, так что потребление памяти не растет с размером файла.
+    Без копирования работают кодировки, совместимые с ASCII (utf-8); строки файлов в utf-16
+    декодируются по одной.
+    """
+
+    def __init__(self, path: str, encoding: Optional[str] = None):
+        """
+        :param path: путь к csv-файлу; перевода строки внутри ячеек быть не должно
+        :param encoding: кодировка, если в файле нет BOM; по умолчанию utf-8
+        """
+        self.path = path
+        with open(path, "rb") as file:
+            self.header, self.codec, self.data_start, self.newline = read_header(file, encoding)
+            self.size = file.seek(0, 2)
+        self.patterns = compile_patterns(self.header)
+        self.row_pattern, self.text_cells = compile_row_pattern(self.header)
+        self.ascii_compatible = _ASCII_MARKERS.encode(self.codec) == _ASCII_MARKERS.encode("ascii")
+
+    def iter_invalid_rows(self) -> Iterator[int]:
+        """
+        Выдает номера невалидных строк по мере их нахождения.
+
+        Нумерация та же, что у validation.find_invalid_rows: с 0 от первой строки данных, пустые строки
+        не считаются.
+
+        :return: итератор номеров невалидных строк по возрастанию
+        """
+        if self.size <= self.data_start:
+            return
+        with open(self.path, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            check_row = self._check_row if self.ascii_compatible else self._check_decoded_row
+            newline = self.newline
+            unit = len(newline)
+            carriage_return = "\r".encode(self.codec)
+            released = 0
+            number = 0
+            start = self.data_start
+            while start < self.size:
+                end = mapped.find(newline, start)
+                while end != -1 and (end - self.data_start) % unit:
+                    end = mapped.find(newline, end + 1)
+                line_end = self.size if end == -1 else end
+                row_end = line_end
+                while row_end > start and mapped[row_end - len(carriage_return):row_end] == carriage_return:
+                    row_end -= len(carriage_return)
+                if row_end > start:
+                    if not check_row(mapped, start, row_end):
+                        yield number
+                    number += 1
+                start = line_end + unit
+                if start - released >= RELEASE_WINDOW:
+                    released = self._release(mapped, released, start)
+
+    def _check_row(self, mapped: mmap.mmap, start: int, end: int) -> bool:
+        """
+        Проверяет строку вида "...";"..." выражением над байтами, декодируя только текстовые ячейки.
+
+        Совпадение возможно, только если в значениях нет кавычек, а тогда csv-модуль разбил бы строку
+        на те же ячейки. Остальные строки (пустые ячейки, кавычки в значениях, ячейки без кавычек,
+        невалидные значения) разбирает csv-модуль.
+        """
+        matched = self.row_pattern.fullmatch(mapped, start, end)
+        if matched and all(pattern.fullmatch(matched.group(group).decode(self.codec))
+                           for group, pattern in self.text_cells):
+            return True
+        return self._check_text(mapped[start:end].decode(self.codec))
+
+    def _check_decoded_row(self, mapped: mmap.mmap, start: int, end: int) -> bool:
+        """Проверяет строку в кодировке, несовместимой с ASCII, декодируя ее целиком."""
+        return self._check_text(mapped[start:end].decode(self.codec))
+
+    def _check_text(self, line: str) -> bool:
+        """Проверяет декодированную строку так же, как validation.invalid_rows."""
+        row = next(csv.reader([line], delimiter=DELIMITER))
+        return len(row) == len(self.patterns) and all(
+            pattern.fullmatch(value) for pattern, value in zip(self.patterns, row))
+
+    @staticmethod
+    def _release(mapped: mmap.mmap, released: int, position: int) -> int:
+        """Возвращает системе страницы отображения до position и выдает новую границу освобожденной части."""
+        end = position // mmap.PAGESIZE * mmap.PAGESIZE
+        if hasattr(mmap, "MADV_DONTNEED") and end > released:
+            mapped.madvise(mmap.MADV_DONTNEED, released, end - released)
+        return max(released, end)
+
+
+def iter_invalid_rows(path: str, encoding: Optional[str] = None) -> Iterator[int]:
+    """
+    Выдает номера невалидных строк csv-файла по мере чтения, см. MappedCsvValidator.
+
+    :param path: путь к csv-файлу
+    :param encoding: кодировка, если в файле нет BOM
+    :return: итератор номеров невалидных строк по возрастанию
+    """
+    return MappedCsvValidator(path, encoding).iter_invalid_rows()
+
+
+def file_checksum(path: str, encoding: Optional[str] = None) -> Tuple[str, int]:
+    """
+    Считает контрольную сумму файла; номера невалидных строк копятся в ChecksumBuilder по 8 байт на номер.
+
+    :param path: путь к csv-файлу
+    :param encoding: кодировка, если в файле нет BOM
+    :return: контрольная сумма и число невалидных строк
+    """
+    builder = ChecksumBuilder()
+    for row in iter_invalid_rows(path, encoding):
+        builder.add(row)
+    return builder.hexdigest(), len(builder)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Потоковая валидация csv-файла и расчет контрольной суммы")
+    parser.add_argument("path", help="путь к csv-файлу варианта")
+    parser.add_argument("--encoding", default=None, help="кодировка файла без BOM")
+    args = parser.parse_args()
+    checksum, count = file_checksum(args.path, args.encoding)
+    print(f"Невалидных строк: {count}")
+    print(checksum)
@@ -0,0 +1,255 @@
+"""
+Валидация csv-файлов лабораторной регулярными выражениями, в том числе параллельно на нескольких ядрах.
+"""
+import argparse
+import codecs
+import csv
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+from typing import BinaryIO, Callable, Dict, List, Optional, Pattern, Sequence, Tuple, TypeVar
+
+from checksum import calculate_checksum
+
+# Регулярные выражения для всех типов полей из README; значение ячейки должно совпасть целиком.
+# Компилируются с re.ASCII: \d и прочие классы не должны пропускать цифры и буквы других алфавитов.
+FIELD_PATTERNS: Dict[str, str] = {
+    "email": r"[a-zA-Z0-9._-]+@[a-zA-Z0-9-]+(?:\.[a-zA-Z0-9-]+)*\.[a-zA-Z]{2,}",
+    "telephone": r"\+7-\(\d{3}\)-\d{3}-\d{2}-\d{2}",
+    "http_status_message": r"[1-5]\d{2} [A-Za-z][A-Za-z' -]*",
+    "height": r"[0-2]\.\d{2}",
+    "snils": r"\d{11}",
+    "inn": r"\d{12}",
+    "passport": r"\d{2} \d{2} \d{6}",
+    "identifier": r"\d{2}-\d{2}/\d{2}",
+    "ip_v4": r"(?:(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)\.){3}(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)",
+    "occupation": r"[A-Za-zА-Яа-яЁё]+(?:[ -][A-Za-zА-Яа-яЁё]+)*",
+    "longitude": r"-?(?:180(?:\.0+)?|(?:1[0-7]\d|\d{1,2})(?:\.\d+)?)",
+    "latitude": r"-?(?:90(?:\.0+)?|[0-8]?\d(?:\.\d+)?)",
+    "hex_color": r"#[0-9a-fA-F]{6}",
+    "blood_type": "(?:AB|A|B|O)[+\u2212]",
+    "isbn": r"(?:\d{3}-)?\d-\d{5}-\d{3}-\d",
+    "issn": r"\d{4}-\d{4}",
+    "locale_code": r"[a-z]{2,3}(?:-[a-z]{2,4})?",
+    "uuid": r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}",
+    "time": r"(?:[01]\d|2[0-3]):[0-5]\d:[0-5]\d\.\d{6}",
+    "date": r"\d{4}-(?:0[1-9]|1[0-2])-(?:0[1-9]|[12]\d|3[01])",
+}
+
+# Разделитель столбцов в файлах лабораторной.
+DELIMITER = ";"
+
+# Диапазонов на один процесс: мелкие диапазоны выравнивают нагрузку, если процессы работают с разной скоростью.
+RANGES_PER_WORKER = 4
+
+# Меньше этого диапазоны не дробятся: передача задачи в процесс дороже проверки нескольких строк.
+MIN_RANGE_SIZE = 1 << 20
+
+# Размер блока, которым ищется граница строки.
+SCAN_BLOCK_SIZE = 1 << 16
+
+# Результат функции, которую map_ranges применяет к каждому диапазону.
+T = TypeVar("T")
+
+_BOMS = ((codecs.BOM_UTF8, "utf-8"), (codecs.BOM_UTF16_LE, "utf-16-le"), (codecs.BOM_UTF16_BE, "utf-16-be"))
+
+
+@lru_cache(maxsize=None)
+def compile_patterns(header: Tuple[str, ...]) -> Tuple[Pattern, ...]:
+    """
+    Компилирует регулярные выражения для столбцов файла. В каждом процессе это делается один раз на заголовок.
+
+    :param header: названия столбцов из первой строки csv-файла
+    :return: скомпилированные выражения в порядке столбцов
+    """
+    unknown = [name for name in header if name not in FIELD_PATTERNS]
+    if unknown:
+        raise ValueError(f"Нет регулярного выражения для столбцов: {', '.join(unknown)}")
+    return tuple(re.compile(FIELD_PATTERNS[name], re.ASCII) for name in header)
+
+
+def detect_encoding(head: bytes, encoding: Optional[str] = None) -> Tuple[str, int]:
+    """
+    Определяет кодировку файла по BOM.
+
+    :param head: первые байты файла
+    :param encoding: кодировка, заданная явно; BOM в начале файла при этом все равно пропускается
+    :return: кодек без BOM, которым декодируется любой диапазон строк, и длина BOM в байтах
+    """
+    for bom, codec in _BOMS:
+        if head.startswith(bom):
+            return encoding or codec, len(bom)
+    return encoding or "utf-8", 0
+
+
+def next_line_start(file: BinaryIO, position: int, data_start: int, newline: bytes) -> int:
+    """
+    Находит начало первой строки, которая начинается не раньше position.
+
+    Перевод строки ищется только на границах кодовых единиц кодировки, чтобы в utf-16 не спутать
+    его с половинкой другого символа.
+
+    :param file: файл, открытый в двоичном режиме
+    :param position: смещение в байтах, от которого ищется граница
+    :param data_start: смещение первой строки данных; от него отсчитывается выравнивание
+    :param newline: перевод строки в кодировке файла
+    :return: смещение начала строки или размер файла, если строк дальше нет
+    """
+    unit = len(newline)
+    position = data_start + max(position - data_start, 0) // unit * unit
+    if position == data_start:
+        return position
+    offset = position - unit
+    file.seek(offset)
+    while True:
+        # SCAN_BLOCK_SIZE кратен длине перевода строки, так что граница блока его не разрезает.
+        block = file.read(SCAN_BLOCK_SIZE)
+        if not block:
+            return offset
+        index = block.find(newline)
+        while index != -1 and index % unit:
+            index = block.find(newline, index + 1)
+        if index != -1:
+            return offset + index + unit
+        offset += len(block)
+
+
+def split_ranges(file: BinaryIO, data_start: int, size: int, newline: bytes, parts: int) -> List[Tuple[int, int]]:
+    """
+    Делит данные файла на диапазоны байтов, границы которых совпадают с началами строк.
+
+    :param file: файл, открытый в двоичном режиме
+    :param data_start: смещение первой строки данных
+    :param size: размер файла
+    :param newline: перевод строки в кодировке файла
+    :param parts: желаемое число диапазонов
+    :return: пары (начало, конец) подряд идущих диапазонов, покрывающих все данные
+    """
+    parts = max(1, min(parts, (size - data_start) // MIN_RANGE_SIZE))
+    step = (size - data_start) / parts
+    bounds = [data_start]
+    for part in range(1, parts):
+        bound = next_line_start(file, data_start + int(step * part), data_start, newline)
+        if bounds[-1] < bound < size:
+            bounds.append(bound)
+    bounds.append(size)
+    return list(zip(bounds, bounds[1:]))
+
+
+def split_rows(text: str) -> List[str]:
+    """
+    Режет текст на строки данных: только по переводу строки, как csv-модуль, отбрасывая \\r и пустые строки.
+
+    :param text: декодированный текст целого числа строк
+    :return: непустые строки без символов перевода строки
+    """
+    return [line for line in (line.rstrip("\r") for line in text.split("\n")) if line]
+
+
+def invalid_rows(lines: Sequence[str], patterns: Sequence[Pattern]) -> List[int]:
+    """
+    Проверяет строки данных регулярными выражениями столбцов.
+
+    :param lines: строки данных csv-файла без заголовка
+    :param patterns: скомпилированные выражения в порядке столбцов
+    :return: номера (с 0) строк, в которых не то число ячеек или хотя бы одна ячейка не прошла проверку
+    """
+    columns = len(patterns)
+    result = []
+    for number, row in enumerate(csv.reader(lines, delimiter=DELIMITER)):
+        if len(row) != columns or not all(pattern.fullmatch(value) for pattern, value in zip(patterns, row)):
+            result.append(number)
+    return result
+
+
+def validate_range(path: str, start: int, end: int, codec: str, header: Tuple[str, ...]) -> Tuple[int, List[int]]:
+    """
+    Проверяет диапазон байтов файла. Выполняется в процессах пула, поэтому принимает только простые значения.
+
+    :param path: путь к csv-файлу
+    :param start: смещение начала первой строки диапазона
+    :param end: смещение конца диапазона
+    :param codec: кодировка файла без BOM
+    :param header: названия столбцов
+    :return: число строк данных в диапазоне и номера невалидных из них, считая от начала диапазона
+    """
+    with open(path, "rb") as file:
+        file.seek(start)
+        lines = split_rows(file.read(end - start).decode(codec))
+    return len(lines), invalid_rows(lines, compile_patterns(header))
+
+
+def read_header(file: BinaryIO, encoding: Optional[str] = None) -> Tuple[Tuple[str, ...], str, int, bytes]:
+    """
+    Читает заголовок csv-файла.
+
+    :param file: файл, открытый в двоичном режиме
+    :param encoding: кодировка, если ее нельзя определить по BOM
+    :return: названия столбцов, кодировка без BOM, смещение первой строки данных и перевод строки в кодировке
+    """
+    file.seek(0)
+    codec, bom_length = detect_encoding(file.read(4), encoding)
+    newline = "\n".encode(codec)
+    data_start = next_line_start(file, bom_length + len(newline), bom_length, newline)
+    file.seek(bom_length)
+    header_line = file.read(data_start - bom_length).decode(codec).rstrip("\r\n")
+    return tuple(next(csv.reader([header_line], delimiter=DELIMITER))), codec, data_start, newline
+
+
+def map_ranges(path: str, range_function: Callable[..., T], workers: Optional[int] = None,
+               encoding: Optional[str] = None) -> Tuple[Tuple[str, ...], List[T]]:
+    """
+    Делит файл на диапазоны байтов по границам строк и применяет к ним range_function в пуле процессов.
+
+    :param path: путь к csv-файлу; перевода строки внутри ячеек быть не должно
+    :param range_function: функция уровня модуля с аргументами (path, start, end, codec, header),
+        как validate_range; ее первым результатом должно быть число строк данных в диапазоне
+    :param workers: число процессов; 1 - обработка в текущем процессе, None - по числу ядер
+    :param encoding: кодировка, если в файле нет BOM; по умолчанию utf-8
+    :return: названия столбцов и результаты для диапазонов в порядке их следования в файле
+    """
+    workers = workers or os.cpu_count() or 1
+    with open(path, "rb") as file:
+        header, codec, data_start, newline = read_header(file, encoding)
+        size = file.seek(0, os.SEEK_END)
+        ranges = split_ranges(file, data_start, size, newline, workers * RANGES_PER_WORKER if workers > 1 else 1)
+
+    if workers == 1 or len(ranges) == 1:
+        return header, [range_function(path, start, end, codec, header) for start, end in ranges]
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as executor:
+        starts, ends = zip(*ranges)
+        return header, list(executor.map(range_function, repeat(path), starts, ends, repeat(codec), repeat(header)))
+
+
+def find_invalid_rows(path: str, workers: Optional[int] = None, encoding: Optional[str] = None) -> List[int]:
+    """
+    Находит невалидные строки csv-файла лабораторной.
+
+    Файл делится на диапазоны байтов по границам строк, диапазоны проверяются в пуле процессов,
+    а результаты склеиваются по порядку с пересчетом номеров. Строки нумеруются с 0 начиная с первой
+    строки данных, как того требует calculate_checksum. Результат не зависит от числа процессов.
+
+    :param path: путь к csv-файлу; перевода строки внутри ячеек быть не должно
+    :param workers: число процессов; 1 - проверка в текущем процессе, None - по числу ядер
+    :param encoding: кодировка, если в файле нет BOM; по умолчанию utf-8
+    :return: отсортированные номера невалидных строк
+    """
+    row_numbers = []
+    offset = 0
+    for count, invalid in map_ranges(path, validate_range, workers, encoding)[1]:
+        row_numbers.extend(offset + number for number in invalid)
+        offset += count
+    return row_numbers
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Валидация csv-файла и расчет контрольной суммы")
+    parser.add_argument("path", help="путь к csv-файлу варианта")
+    parser.add_argument("--workers", type=int, default=None, help="число процессов, по умолчанию по числу ядер")
+    parser.add_argument("--encoding", default=None, help="кодировка файла без BOM")
+    args = parser.parse_args()
+    rows = find_invalid_rows(args.path, args.workers, args.encoding)
+    print(f"Невалидных строк: {len(rows)}")
+    print(calculate_checksum(rows))
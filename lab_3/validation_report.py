@@ -0,0 +1,325 @@
+"""
+Отчет о валидации csv-файла по полям: какие строки не прошли проверку в каждом столбце.
+
+Отчет можно сохранить в двоичный столбцовый файл и закешировать по хешу содержимого csv-файла,
+чтобы повторные запуски и сравнения двух прогонов не проверяли неизменившиеся файлы заново.
+"""
+import argparse
+import csv
+import hashlib
+import heapq
+import json
+import os
+import struct
+import sys
+import tempfile
+from array import array
+from typing import Dict, Iterable, List, Optional, Pattern, Sequence, Tuple
+
+from checksum import ChecksumBuilder, serialize_result
+from validation import DELIMITER, FIELD_PATTERNS, compile_patterns, map_ranges, read_header, split_rows
+
+# Сигнатура и версия двоичного файла отчета.
+REPORT_MAGIC = b"LAB3RPT1"
+
+# Расширение файлов отчетов в каталоге кеша.
+REPORT_SUFFIX = ".lab3report"
+
+# Размер блока, которым читается файл при подсчете хеша.
+HASH_BLOCK_SIZE = 1 << 20
+
+_LENGTH = struct.Struct("<I")
+
+
+def file_digest(path: str) -> str:
+    """
+    Считает sha256 содержимого файла, читая его блоками.
+
+    :param path: путь к файлу
+    :return: хеш в шестнадцатеричном виде
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def patterns_digest(header: Sequence[str]) -> str:
+    """
+    Считает хеш регулярных выражений столбцов: отчет из кеша годится, только пока они не менялись.
+
+    :param header: названия столбцов
+    :return: хеш в шестнадцатеричном виде
+    """
+    return hashlib.sha256(json.dumps([[name, FIELD_PATTERNS[name]] for name in header]).encode("utf-8")).hexdigest()
+
+
+def _sorted_union(columns: Iterable[array]) -> array:
+    """Сливает отсортированные массивы номеров в один отсортированный массив без повторов."""
+    union = array("q")
+    for row in heapq.merge(*columns):
+        if not union or union[-1] != row:
+            union.append(row)
+    return union
+
+
+class ValidationReport:
+    """
+    Номера невалидных строк файла отдельно по каждому столбцу.
+
+    Невалидных значений в файлах лабораторной около процента, поэтому номера хранятся отсортированными
+    массивами array('q'), а не битовыми масками на все строки файла. Строки с неверным числом ячеек
+    не относятся ни к одному столбцу и хранятся отдельно в malformed.
+    """
+
+    def __init__(self, header: Sequence[str], rows: int, fields: Dict[str, array], malformed: array,
+                 source_digest: str = "", rules_digest: str = ""):
+        """
+        :param header: названия столбцов
+        :param rows: число строк данных в файле
+        :param fields: отсортированные номера невалидных строк для каждого столбца
+        :param malformed: отсортированные номера строк с неверным числом ячеек
+        :param source_digest: sha256 проверенного файла
+        :param rules_digest: хеш регулярных выражений, которыми он проверен
+        """
+        self.header = tuple(header)
+        self.rows = rows
+        self.fields = fields
+        self.malformed = malformed
+        self.source_digest = source_digest
+        self.rules_digest = rules_digest
+
+    def invalid_rows(self) -> array:
+        """
+        :return: отсортированные номера строк, не прошедших проверку хотя бы в одном столбце
+        """
+        return _sorted_union([*self.fields.values(), self.malformed])
+
+    def checksum(self) -> str:
+        """
+        :return: контрольная сумма, совпадающая с calculate_checksum(find_invalid_rows(...))
+        """
+        builder = ChecksumBuilder()
+        builder.add_rows(self.invalid_rows(), is_sorted=True)
+        return builder.hexdigest()
+
+    def counts(self) -> Dict[str, int]:
+        """
+        :return: число невалидных значений в каждом столбце
+        """
+        return {name: len(rows) for name, rows in self.fields.items()}
+
+    def diff(self, other: "ValidationReport") -> Dict[str, Tuple[List[int], List[int]]]:
+        """
+        Сравнивает отчет с отчетом другого прогона.
+
+        :param other: отчет, с которым сравнивается этот
+        :return: для столбцов с различиями - строки, невалидные только здесь, и строки, невалидные только в other;
+            строки с неверным числом ячеек сравниваются под пустым именем
+        """
+        mine = dict(self.fields, **{"": self.malformed})
+        theirs = dict(other.fields, **{"": other.malformed})
+        result = {}
+        for name in dict.fromkeys([*mine, *theirs]):
+            left = set(mine.get(name, ()))
+            right = set(theirs.get(name, ()))
+            if left != right:
+                result[name] = sorted(left - right), sorted(right - left)
+        return result
+
+    def write_result(self, variant: int, path: Optional[str] = None) -> None:
+        """
+        Записывает result.json с контрольной суммой отчета, см. checksum.serialize_result.
+
+        :param variant: номер варианта
+        :param path: куда записать результат; по умолчанию result.json лабораторной
+        """
+        serialize_result(variant, self.checksum(), path)
+
+    def write(self, path: str) -> None:
+        """
+        Сохраняет отчет в двоичный столбцовый файл.
+
+        Формат: сигнатура REPORT_MAGIC, длина метаданных (uint32 little-endian), метаданные в json,
+        затем номера строк каждого столбца и строк с неверным числом ячеек подряд как int64 little-endian.
+        Файл пишется во временный и подменяет старый целиком.
+
+        :param path: путь к файлу отчета
+        """
+        columns = [*self.fields.values(), self.malformed]
+        metadata = json.dumps({
+            "header": self.header,
+            "rows": self.rows,
+            "counts": [len(column) for column in columns],
+            "source_digest": self.source_digest,
+            "rules_digest": self.rules_digest,
+        }).encode("utf-8")
+        directory = os.path.dirname(os.path.abspath(path))
+        with tempfile.NamedTemporaryFile("wb", dir=directory, delete=False) as file:
+            file.write(REPORT_MAGIC + _LENGTH.pack(len(metadata)) + metadata)
+            for column in columns:
+                column = array("q", column)
+                if sys.byteorder == "big":
+                    column.byteswap()
+                column.tofile(file)
+        os.replace(file.name, path)
+
+    @classmethod
+    def read(cls, path: str) -> "ValidationReport":
+        """
+        Загружает отчет, сохраненный методом write.
+
+        :param path: путь к файлу отчета
+        :return: отчет
+        """
+        with open(path, "rb") as file:
+            if file.read(len(REPORT_MAGIC)) != REPORT_MAGIC:
+                raise ValueError(f"{path} не является файлом отчета о валидации")
+            (length,) = _LENGTH.unpack(file.read(_LENGTH.size))
+            metadata = json.loads(file.read(length).decode("utf-8"))
+            columns = []
+            for count in metadata["counts"]:
+                column = array("q")
+                column.fromfile(file, count)
+                if sys.byteorder == "big":
+                    column.byteswap()
+                columns.append(column)
+        header = metadata["header"]
+        return cls(header, metadata["rows"], dict(zip(header, columns)), columns[-1],
+                   metadata["source_digest"], metadata["rules_digest"])
+
+
+def field_failures(lines: Sequence[str], patterns: Sequence[Pattern]) -> Tuple[List[List[int]], List[int]]:
+    """
+    Проверяет каждую ячейку строк данных, не останавливаясь на первой ошибке в строке.
+
+    :param lines: строки данных csv-файла без заголовка
+    :param patterns: скомпилированные выражения в порядке столбцов
+    :return: номера (с 0) невалидных строк по столбцам и номера строк с неверным числом ячеек
+    """
+    columns = len(patterns)
+    fields = [[] for _ in patterns]
+    malformed = []
+    for number, row in enumerate(csv.reader(lines, delimiter=DELIMITER)):
+        if len(row) != columns:
+            malformed.append(number)
+            continue
+        for failures, pattern, value in zip(fields, patterns, row):
+            if not pattern.fullmatch(value):
+                failures.append(number)
+    return fields, malformed
+
+
+def report_range(path: str, start: int, end: int, codec: str,
+                 header: Tuple[str, ...]) -> Tuple[int, List[List[int]], List[int]]:
+    """
+    Проверяет по столбцам диапазон байтов файла. Выполняется в процессах пула, как validation.validate_range.
+
+    :param path: путь к csv-файлу
+    :param start: смещение начала первой строки диапазона
+    :param end: смещение конца диапазона
+    :param codec: кодировка файла без BOM
+    :param header: названия столбцов
+    :return: число строк данных в диапазоне и результат field_failures, считая от начала диапазона
+    """
+    with open(path, "rb") as file:
+        file.seek(start)
+        lines = split_rows(file.read(end - start).decode(codec))
+    return (len(lines), *field_failures(lines, compile_patterns(header)))
+
+
+def build_report(path: str, workers: Optional[int] = None, encoding: Optional[str] = None,
+                 source_digest: Optional[str] = None) -> ValidationReport:
+    """
+    Проверяет csv-файл и составляет отчет по столбцам. Файл делится на диапазоны функцией
+    validation.map_ranges, как в validation.find_invalid_rows, и строки нумеруются так же.
+
+    :param path: путь к csv-файлу; перевода строки внутри ячеек быть не должно
+    :param workers: число процессов; 1 - проверка в текущем процессе, None - по числу ядер
+    :param encoding: кодировка, если в файле нет BOM; по умолчанию utf-8
+    :param source_digest: уже посчитанный file_digest(path), чтобы не читать файл для хеша еще раз
+    :return: отчет о валидации
+    """
+    header, results = map_ranges(path, report_range, workers, encoding)
+    fields = {name: array("q") for name in header}
+    malformed = array("q")
+    offset = 0
+    for count, failures, bad_rows in results:
+        for column, rows in zip(fields.values(), failures):
+            column.extend(offset + number for number in rows)
+        malformed.extend(offset + number for number in bad_rows)
+        offset += count
+    return ValidationReport(header, offset, fields, malformed, source_digest or file_digest(path),
+                            patterns_digest(header))
+
+
+class ReportCache:
+    """
+    Каталог отчетов, ключом к которым служат sha256 csv-файла и хеш регулярных выражений его столбцов.
+
+    Подсчет хеша файла намного дешевле проверки всех его ячеек, так что неизменившийся файл заново не проверяется.
+    """
+
+    def __init__(self, directory: str):
+        """
+        :param directory: каталог для файлов отчетов; создается при первой записи
+        """
+        self.directory = directory
+
+    def report_path(self, source_digest: str, rules_digest: str) -> str:
+        """Путь к отчету о файле с хешем source_digest, проверенном выражениями с хешем rules_digest."""
+        return os.path.join(self.directory, f"{source_digest}-{rules_digest[:16]}{REPORT_SUFFIX}")
+
+    def load(self, path: str, workers: Optional[int] = None, encoding: Optional[str] = None) -> ValidationReport:
+        """
+        Возвращает отчет из кеша или составляет и сохраняет новый.
+
+        :param path: путь к csv-файлу
+        :param workers: число процессов для проверки, если отчета нет в кеше
+        :param encoding: кодировка, если в файле нет BOM
+        :return: отчет о валидации
+        """
+        with open(path, "rb") as file:
+            header = read_header(file, encoding)[0]
+        source_digest = file_digest(path)
+        cached = self.report_path(source_digest, patterns_digest(header))
+        if os.path.exists(cached):
+            return ValidationReport.read(cached)
+        report = build_report(path, workers, encoding, source_digest)
+        os.makedirs(self.directory, exist_ok=True)
+        report.write(self.report_path(report.source_digest, report.rules_digest))
+        return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Отчет о валидации csv-файла по столбцам")
+    parser.add_argument("path", help="путь к csv-файлу варианта")
+    parser.add_argument("--workers", type=int, default=None, help="число процессов, по умолчанию по числу ядер")
+    parser.add_argument("--encoding", default=None, help="кодировка файла без BOM")
+    parser.add_argument("--cache", default=None, help="каталог кеша отчетов")
+    parser.add_argument("--report", default=None, help="сохранить отчет в двоичный столбцовый файл")
+    parser.add_argument("--compare", default=None, help="сравнить с другим csv-файлом или сохраненным отчетом")
+    parser.add_argument("--variant", type=int, default=None, help="записать result.json с этим номером варианта")
+    args = parser.parse_args()
+
+    def load(path: str) -> ValidationReport:
+        if path.endswith(REPORT_SUFFIX):
+            return ValidationReport.read(path)
+        if args.cache:
+            return ReportCache(args.cache).load(path, args.workers, args.encoding)
+        return build_report(path, args.workers, args.encoding)
+
+    report = load(args.path)
+    for name, count in report.counts().items():
+        print(f"{name:>20}: {count}")
+    print(f"Строк с неверным числом ячеек: {len(report.malformed)}")
+    print(f"Невалидных строк: {len(report.invalid_rows())} из {report.rows}")
+    print(report.checksum())
+    if args.report:
+        report.write(args.report)
+    if args.compare:
+        for name, (added, removed) in report.diff(load(args.compare)).items():
+            print(f"{name or 'число ячеек'}: только здесь {added}, только в {args.compare} {removed}")
+    if args.variant is not None:
+        report.write_result(args.variant)